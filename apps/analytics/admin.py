@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from apps.analytics.models import DailyEventRollup, DailyDishRollup
+
+
+@admin.register(DailyEventRollup)
+class DailyEventRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'hole', 'event_type', 'events', 'guests', 'dishes_revenue', 'options_revenue')
+    list_filter = ('event_type',)
+    list_select_related = ('hole',)
+    date_hierarchy = 'day'
+
+
+@admin.register(DailyDishRollup)
+class DailyDishRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'dish', 'dish_type', 'orders', 'portions', 'revenue')
+    list_filter = ('dish_type',)
+    list_select_related = ('dish',)
+    date_hierarchy = 'day'
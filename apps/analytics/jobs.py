@@ -0,0 +1,9 @@
+from apps.analytics.rollups import get_refresh_range, refresh_rollups
+from apps.banket.scheduler import register_job
+
+HOUR = 60 * 60
+
+
+@register_job('refresh_analytics', interval=HOUR)
+def refresh_analytics():
+    return refresh_rollups(*get_refresh_range())
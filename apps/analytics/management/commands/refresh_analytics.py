@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from apps.analytics.rollups import get_refresh_range, refresh_rollups
+from apps.banket.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily analytics rollups for the days that can still change, or for a given range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ANALYTICS_LOOKBACK_DAYS,
+                            help='Refresh days from this many days ago up to the last planned event.')
+        parser.add_argument('--from', dest='date_from', type=date.fromisoformat, help='First day to refresh.')
+        parser.add_argument('--to', dest='date_to', type=date.fromisoformat, help='Last day to refresh.')
+        parser.add_argument('--full', action='store_true', help='Rebuild the rollups of every event.')
+
+    def handle(self, *args, **options):
+        date_from, date_to = get_refresh_range(options['days'])
+        if options['full']:
+            date_from = Event.objects.aggregate(first=Min('date_planned'))['first'] or date_from
+        date_from = options['date_from'] or date_from
+        date_to = options['date_to'] or date_to
+        if date_from > date_to:
+            raise CommandError('--from must not be later than --to.')
+        rows = refresh_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {date_from} .. {date_to}: {rows} rollup rows'))
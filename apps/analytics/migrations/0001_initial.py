@@ -0,0 +1,49 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('banket', '0013_hall_layout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEventRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('event_type', models.CharField(choices=[('BIRTHDAY', 'Birthday'), ('WEDDING', 'Wedding'), ('CHRISTENING', 'Сhristening'), ('OTHER', 'Other')], max_length=255)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('guests', models.PositiveIntegerField(default=0)),
+                ('dishes_revenue', models.FloatField(default=0)),
+                ('options_revenue', models.FloatField(default=0)),
+                ('hole', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='banket.hole')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyDishRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dish_type', models.CharField(choices=[('COLD', 'Cold'), ('WARM', 'Warm'), ('SNACK', 'Snack'), ('SALAD', 'Salad'), ('DRINK', 'Drink')], max_length=255)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('portions', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('dish', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='banket.dish')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailyeventrollup',
+            index=models.Index(fields=['day', 'hole'], name='analytics_d_day_e100f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailydishrollup',
+            index=models.Index(fields=['day', 'dish_type'], name='analytics_d_day_56dbc3_idx'),
+        ),
+    ]
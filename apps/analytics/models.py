@@ -0,0 +1,38 @@
+from django.db import models
+
+from apps.banket.models import Hole, Dish, Event
+
+
+class DailyEventRollup(models.Model):
+    day = models.DateField()
+    hole = models.ForeignKey(Hole, on_delete=models.SET_NULL, null=True)
+    event_type = models.CharField(max_length=255, choices=Event.EVENT_TYPES)
+    events = models.PositiveIntegerField(default=0)
+    guests = models.PositiveIntegerField(default=0)
+    dishes_revenue = models.FloatField(default=0)
+    options_revenue = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'hole']),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.event_type}'
+
+
+class DailyDishRollup(models.Model):
+    day = models.DateField()
+    dish = models.ForeignKey(Dish, on_delete=models.SET_NULL, null=True)
+    dish_type = models.CharField(max_length=255, choices=Dish.DISH_TYPES)
+    orders = models.PositiveIntegerField(default=0)
+    portions = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'dish_type']),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.dish_id}'
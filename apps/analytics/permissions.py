@@ -0,0 +1,7 @@
+from rest_framework import permissions
+
+
+class IsSuperUser(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from apps.analytics.models import DailyEventRollup, DailyDishRollup
+from apps.banket.models import Event, Guest, OrderedDish, ArchivedGuest, ArchivedOrderedDish
+
+
+def get_refresh_range(lookback_days=None):
+    """
+    Days whose rollups can still change: recently passed events may get late
+    edits and upcoming ones are still being booked. Older days are frozen.
+    """
+    if lookback_days is None:
+        lookback_days = settings.ANALYTICS_LOOKBACK_DAYS
+    date_from = timezone.localdate() - timedelta(days=lookback_days)
+    last_day = Event.objects.aggregate(last=Max('date_planned'))['last']
+    return date_from, max(last_day or date_from, date_from)
+
+
+def get_event_rollups(date_from, date_to):
+    key_fields = ('date_planned', 'hole_id', 'event_type')
+    rollups = defaultdict(lambda: {'events': 0, 'guests': 0, 'dishes_revenue': 0.0, 'options_revenue': 0.0})
+    events = Event.objects.filter(date_planned__range=(date_from, date_to))
+
+    for row in events.values(*key_fields).annotate(count=Count('id')).order_by():
+        rollups[tuple(row[field] for field in key_fields)]['events'] += row['count']
+
+    related = tuple(f'event__{field}' for field in key_fields)
+    for model in (Guest, ArchivedGuest):
+        rows = model.objects.filter(
+            event__date_planned__range=(date_from, date_to)
+        ).values(*related).annotate(count=Count('id')).order_by()
+        for row in rows:
+            rollups[tuple(row[field] for field in related)]['guests'] += row['count']
+
+    for model in (OrderedDish, ArchivedOrderedDish):
+        rows = model.objects.filter(
+            event__date_planned__range=(date_from, date_to)
+        ).values(*related).annotate(total=Sum(F('amount') * F('dish__price'))).order_by()
+        for row in rows:
+            rollups[tuple(row[field] for field in related)]['dishes_revenue'] += row['total'] or 0.0
+
+    rows = Event.add_options.through.objects.filter(
+        event__date_planned__range=(date_from, date_to)
+    ).values(*related).annotate(total=Sum('additionaloptions__price')).order_by()
+    for row in rows:
+        rollups[tuple(row[field] for field in related)]['options_revenue'] += row['total'] or 0.0
+
+    return [
+        DailyEventRollup(day=day, hole_id=hole_id, event_type=event_type, **totals)
+        for (day, hole_id, event_type), totals in rollups.items()
+    ]
+
+
+def get_dish_rollups(date_from, date_to):
+    key_fields = ('event__date_planned', 'dish_id', 'dish__dish_type')
+    rollups = defaultdict(lambda: {'orders': 0, 'portions': 0, 'revenue': 0.0})
+    for model in (OrderedDish, ArchivedOrderedDish):
+        rows = model.objects.filter(
+            event__date_planned__range=(date_from, date_to)
+        ).values(*key_fields).annotate(
+            orders=Count('id'), portions=Sum('amount'), revenue=Sum(F('amount') * F('dish__price')),
+        ).order_by()
+        for row in rows:
+            totals = rollups[tuple(row[field] for field in key_fields)]
+            totals['orders'] += row['orders']
+            totals['portions'] += row['portions'] or 0
+            totals['revenue'] += row['revenue'] or 0.0
+    return [
+        DailyDishRollup(day=day, dish_id=dish_id, dish_type=dish_type, **totals)
+        for (day, dish_id, dish_type), totals in rollups.items()
+    ]
+
+
+def refresh_rollups(date_from, date_to):
+    """
+    Recomputes the rollups of [date_from, date_to] with one GROUP BY query per
+    source table and swaps them in within a transaction, so readers never
+    see a half-refreshed range. Returns the number of rollup rows written.
+    """
+    event_rollups = get_event_rollups(date_from, date_to)
+    dish_rollups = get_dish_rollups(date_from, date_to)
+    with transaction.atomic():
+        DailyEventRollup.objects.filter(day__range=(date_from, date_to)).delete()
+        DailyDishRollup.objects.filter(day__range=(date_from, date_to)).delete()
+        DailyEventRollup.objects.bulk_create(event_rollups, batch_size=500)
+        DailyDishRollup.objects.bulk_create(dish_rollups, batch_size=500)
+    return len(event_rollups) + len(dish_rollups)
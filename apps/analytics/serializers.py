@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+MAX_POPULAR_DISHES = 100
+
+
+class AnalyticsRangeSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=True)
+    date_to = serializers.DateField(required=True)
+    top = serializers.IntegerField(min_value=1, max_value=MAX_POPULAR_DISHES, default=10)
+
+    def validate(self, attrs):
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_to': 'date_to must not be earlier than date_from.'})
+        return attrs
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.analytics.models import DailyEventRollup, DailyDishRollup
+from apps.analytics.rollups import refresh_rollups
+from apps.banket.archive import archive_event_ids
+from apps.banket.factories import create_user, create_hall, create_menu, create_event, get_auth_header
+
+
+class AnalyticsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.admin = create_user(is_superuser=True)
+        cls.hall = create_hall(seats=100)
+        cls.menu, cls.options = create_menu(dishes=4, options=2)
+        cls.wedding = create_event(
+            cls.user, cls.hall, guests=40, dishes=cls.menu[:2], options=cls.options, days_ahead=1, event_type='WEDDING'
+        )
+        cls.birthday = create_event(cls.user, cls.hall, guests=20, dishes=cls.menu[:1], days_ahead=2)
+        cls.day_from = date.today()
+        cls.day_to = date.today() + timedelta(days=10)
+
+    def setUp(self):
+        cache.clear()
+        refresh_rollups(self.day_from, self.day_to)
+
+    def summary(self, user=None, **params):
+        self.client.credentials(**get_auth_header(user or self.admin))
+        return self.client.get(reverse('analytics_summary'), {
+            'date_from': self.day_from, 'date_to': self.day_to, **params,
+        })
+
+    def test_rollups_match_the_source_tables(self):
+        self.assertEqual(DailyEventRollup.objects.count(), 2)
+        wedding = DailyEventRollup.objects.get(event_type='WEDDING')
+        self.assertEqual(wedding.guests, 40)
+        self.assertEqual(wedding.dishes_revenue, 40 * (self.menu[0].price + self.menu[1].price))
+        self.assertEqual(wedding.options_revenue, sum(option.price for option in self.options))
+        portions = DailyDishRollup.objects.filter(dish=self.menu[0]).values_list('portions', flat=True)
+        self.assertEqual(sum(portions), 60)
+
+    def test_refresh_is_idempotent_and_includes_archived_rows(self):
+        archive_event_ids([self.wedding.id])
+        refresh_rollups(self.day_from, self.day_to)
+        self.assertEqual(DailyEventRollup.objects.count(), 2)
+        self.assertEqual(DailyEventRollup.objects.get(event_type='WEDDING').guests, 40)
+
+    def test_summary_reads_only_rollups(self):
+        self.summary()
+        with self.assertNumQueries(5):
+            response = self.summary()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['bookings_by_hall'][0]['events'], 2)
+        self.assertEqual(response.data['popular_dishes'][0]['dish'], self.menu[0].id)
+        wedding = next(row for row in response.data['guests_by_event_type'] if row['event_type'] == 'WEDDING')
+        self.assertEqual(wedding['average_guests'], 40.0)
+
+    def test_summary_is_for_superusers(self):
+        self.assertEqual(self.summary(user=self.user).status_code, 403)
+
+    def test_command_refreshes_a_range(self):
+        DailyEventRollup.objects.all().delete()
+        call_command('refresh_analytics', '--from', str(self.day_from), '--to', str(self.day_to), stdout=StringIO())
+        self.assertEqual(DailyEventRollup.objects.count(), 2)
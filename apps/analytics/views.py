@@ -0,0 +1,67 @@
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from rest_framework import generics, status
+from rest_framework.response import Response
+
+from apps.analytics.models import DailyEventRollup, DailyDishRollup
+from apps.analytics.permissions import IsSuperUser
+from apps.analytics.serializers import AnalyticsRangeSerializer
+from apps.users.authentication import CachedJWTAuthentication
+
+
+class AnalyticsSummaryView(generics.GenericAPIView):
+    permission_classes = (IsSuperUser,)
+    authentication_classes = (CachedJWTAuthentication,)
+    serializer_class = AnalyticsRangeSerializer
+    filter_backends = ()
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        days = (serializer.validated_data['date_from'], serializer.validated_data['date_to'])
+        events = DailyEventRollup.objects.filter(day__range=days)
+        dishes = DailyDishRollup.objects.filter(day__range=days)
+
+        revenue_by_month = events.annotate(month=TruncMonth('day')).values('month').annotate(
+            events=Sum('events'), guests=Sum('guests'), revenue=Sum(F('dishes_revenue') + F('options_revenue')),
+        ).order_by('month')
+        bookings_by_hall = events.values('hole_id', 'hole__name').annotate(
+            events=Sum('events'), guests=Sum('guests'),
+        ).order_by('-events')
+        guests_by_event_type = events.values('event_type').annotate(
+            events=Sum('events'), guests=Sum('guests'),
+        ).order_by('event_type')
+        orders_by_dish_type = dishes.values('dish_type').annotate(
+            orders=Sum('orders'), portions=Sum('portions'), revenue=Sum('revenue'),
+        ).order_by('dish_type')
+        popular_dishes = dishes.values('dish_id', 'dish__name').annotate(
+            orders=Sum('orders'), portions=Sum('portions'), revenue=Sum('revenue'),
+        ).order_by('-portions')[:serializer.validated_data['top']]
+
+        data = {
+            'revenue_by_month': [
+                {'month': row['month'].strftime('%Y-%m'), 'events': row['events'], 'guests': row['guests'],
+                 'revenue': round(row['revenue'], 2)}
+                for row in revenue_by_month
+            ],
+            'bookings_by_hall': [
+                {'hole': row['hole_id'], 'name': row['hole__name'], 'events': row['events'], 'guests': row['guests']}
+                for row in bookings_by_hall
+            ],
+            'guests_by_event_type': [
+                {'event_type': row['event_type'], 'events': row['events'], 'guests': row['guests'],
+                 'average_guests': round(row['guests'] / row['events'], 1) if row['events'] else 0.0}
+                for row in guests_by_event_type
+            ],
+            'orders_by_dish_type': [
+                {'dish_type': row['dish_type'], 'orders': row['orders'], 'portions': row['portions'],
+                 'revenue': round(row['revenue'], 2)}
+                for row in orders_by_dish_type
+            ],
+            'popular_dishes': [
+                {'dish': row['dish_id'], 'name': row['dish__name'], 'orders': row['orders'],
+                 'portions': row['portions'], 'revenue': round(row['revenue'], 2)}
+                for row in popular_dishes
+            ],
+        }
+        return Response(data=data, status=status.HTTP_200_OK)
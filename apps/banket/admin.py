@@ -1,5 +1,13 @@
 from django.contrib import admin
-from apps.banket.models import Event, Hole, Image, Dish, OrderedDish, Comment, Seat, AdditionalOptions
+from apps.banket.models import Event, Hole, Image, Dish, OrderedDish, Comment, Seat, AdditionalOptions, Zone, Table, \
+    SeatPosition, Guest
+from apps.banket.paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
 
 
 class ImageInline(admin.TabularInline):
@@ -7,36 +15,83 @@ class ImageInline(admin.TabularInline):
     extra = 0
 
 
+class ZoneInline(admin.TabularInline):
+    model = Zone
+    extra = 0
+
+
+class TableInline(admin.TabularInline):
+    model = Table
+    extra = 0
+
+
+class SeatPositionInline(admin.TabularInline):
+    model = SeatPosition
+    extra = 0
+
+
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
-    pass
+class EventAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'hole', 'event_type', 'date_planned', 'is_passed', 'is_archived')
+    list_select_related = ('user', 'hole')
+    list_filter = ('event_type', 'is_passed', 'is_archived')
+    raw_id_fields = ('user',)
+    autocomplete_fields = ('hole', 'add_options')
+    date_hierarchy = 'date_planned'
 
 
 @admin.register(Hole)
 class HoleAdmin(admin.ModelAdmin):
-    inlines = [ImageInline, ]
+    inlines = [ImageInline, ZoneInline, TableInline]
+    list_display = ('id', 'name', 'number_of_seats')
+    search_fields = ('name',)
+
+
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    inlines = [SeatPositionInline, ]
+    list_display = ('id', 'name', 'hole', 'zone')
+    list_select_related = ('hole', 'zone__hole')
 
 
 @admin.register(Dish)
 class DishAdmin(admin.ModelAdmin):
-    pass
+    list_display = ('id', 'name', 'dish_type', 'price')
+    list_filter = ('dish_type',)
+    search_fields = ('name',)
 
 
 @admin.register(OrderedDish)
-class OrderedDishAdmin(admin.ModelAdmin):
-    pass
+class OrderedDishAdmin(LargeTableAdmin):
+    list_display = ('id', 'dish', 'amount', 'event', 'user')
+    list_select_related = ('dish', 'event__user', 'user')
+    raw_id_fields = ('user', 'event')
+    autocomplete_fields = ('dish',)
 
 
 @admin.register(Comment)
-class DishAdmin(admin.ModelAdmin):
-    pass
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'text')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
 
 
 @admin.register(Seat)
-class SeatAdmin(admin.ModelAdmin):
-    pass
+class SeatAdmin(LargeTableAdmin):
+    list_display = ('id', 'number', 'event', 'table', 'is_engaged')
+    list_select_related = ('event__user', 'table__hole')
+    list_filter = ('is_engaged',)
+    raw_id_fields = ('event', 'position', 'table')
+
+
+@admin.register(Guest)
+class GuestAdmin(LargeTableAdmin):
+    list_display = ('id', 'first_name', 'last_name', 'email', 'event', 'seat')
+    list_select_related = ('event__user', 'seat')
+    raw_id_fields = ('user', 'event', 'seat')
 
 
 @admin.register(AdditionalOptions)
 class AdditionalOptionsAdmin(admin.ModelAdmin):
-    pass
+    list_display = ('id', 'name', 'price')
+    search_fields = ('name',)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BanketConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.banket'
+
+    def ready(self):
+        from apps.banket import jobs, layout, pricing  # noqa: F401
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.banket.models import Event, Seat, Guest, OrderedDish, ArchivedSeat, ArchivedGuest, ArchivedOrderedDish
+
+ARCHIVE_BATCH_SIZE = 100
+
+
+def get_archivable_events(retention_days=None):
+    if retention_days is None:
+        retention_days = settings.EVENT_RETENTION_DAYS
+    retention_date = timezone.localdate() - timedelta(days=retention_days)
+    return Event.objects.filter(is_passed=True, is_archived=False, date_planned__lt=retention_date)
+
+
+def archive_event_ids(event_ids):
+    """
+    Moves the guests, engaged seats and ordered dishes of the given events to
+    the archive tables with set-based INSERT ... SELECT / DELETE statements.
+    Free seats carry no information once an event has passed and are dropped.
+    Returns the number of rows removed from the active tables.
+    """
+    placeholders = ', '.join(['%s'] * len(event_ids))
+    seat_ids = f'SELECT id FROM {Seat._meta.db_table} WHERE event_id IN ({placeholders})'
+    guest_condition = f'event_id IN ({placeholders}) OR seat_id IN ({seat_ids})'
+    params = list(event_ids)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {ArchivedGuest._meta.db_table} '
+            f'(original_id, user_id, event_id, first_name, last_name, email, seat_number, version) '
+            f'SELECT g.id, g.user_id, COALESCE(g.event_id, s.event_id), g.first_name, g.last_name, g.email, s.number, '
+            f'g.version '
+            f'FROM (SELECT * FROM {Guest._meta.db_table} WHERE {guest_condition}) g '
+            f'LEFT JOIN {Seat._meta.db_table} s ON s.id = g.seat_id',
+            params * 2,
+        )
+        cursor.execute(
+            f'INSERT INTO {ArchivedSeat._meta.db_table} '
+            f'(original_id, event_id, number, description, is_engaged, version, position_id, table_id) '
+            f'SELECT id, event_id, number, description, is_engaged, version, position_id, table_id '
+            f'FROM {Seat._meta.db_table} '
+            f'WHERE event_id IN ({placeholders}) AND is_engaged',
+            params,
+        )
+        cursor.execute(
+            f'INSERT INTO {ArchivedOrderedDish._meta.db_table} (original_id, user_id, dish_id, amount, event_id) '
+            f'SELECT id, user_id, dish_id, amount, event_id FROM {OrderedDish._meta.db_table} '
+            f'WHERE event_id IN ({placeholders})',
+            params,
+        )
+
+        removed = 0
+        cursor.execute(f'DELETE FROM {Guest._meta.db_table} WHERE {guest_condition}', params * 2)
+        removed += cursor.rowcount
+        cursor.execute(f'DELETE FROM {Seat._meta.db_table} WHERE event_id IN ({placeholders})', params)
+        removed += cursor.rowcount
+        cursor.execute(f'DELETE FROM {OrderedDish._meta.db_table} WHERE event_id IN ({placeholders})', params)
+        removed += cursor.rowcount
+
+        Event.objects.filter(id__in=event_ids).update(is_archived=True, updated_at=timezone.now())
+    return removed
+
+
+def archive_events(events, batch_size=ARCHIVE_BATCH_SIZE):
+    event_ids = list(events.values_list('id', flat=True))
+    removed = 0
+    for i in range(0, len(event_ids), batch_size):
+        removed += archive_event_ids(event_ids[i:i + batch_size])
+    return removed
@@ -0,0 +1,83 @@
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.banket.models import Event, Seat, Guest, OrderedDish, ArchivedGuest, ArchivedOrderedDish, create_event_seats
+
+
+def clone_event(source, user, date_planned, hole=None, description=None, include_guests=False):
+    """
+    Creates a new event for `user` from `source` in one transaction, with
+    set-based INSERT ... SELECT statements: its options, its ordered dishes
+    and, optionally, its guests on the seats with the same numbers. Archived
+    events are cloned from the archive tables.
+
+    The event row is inserted with bulk_create so the create_seats signal
+    does not fire. Seats are always built from the hall as it is now, so a
+    changed layout or seat count is never inherited from the source; in the
+    same hall, seat descriptions of an active source are copied by number.
+    """
+    hole_id = hole.pk if hole is not None else source.hole_id
+    event = Event(
+        user=user,
+        hole_id=hole_id,
+        description=source.description if description is None else description,
+        event_type=source.event_type,
+        date_planned=date_planned,
+    )
+    if hole is not None:
+        event.hole = hole
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        try:
+            with transaction.atomic():
+                Event.objects.bulk_create([event])
+        except IntegrityError:
+            raise ValidationError({'date_planned': 'The hall is already booked for this date.'})
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        options_table = Event.add_options.through._meta.db_table
+        cursor.execute(
+            f'INSERT INTO {options_table} (event_id, additionaloptions_id) '
+            f'SELECT %s, additionaloptions_id FROM {options_table} WHERE event_id = %s',
+            [event.pk, source.pk],
+        )
+
+        if hole_id is not None:
+            create_event_seats(event)
+        if hole_id == source.hole_id and not source.is_archived:
+            cursor.execute(
+                f'UPDATE {Seat._meta.db_table} SET description = ('
+                f'SELECT s.description FROM {Seat._meta.db_table} s '
+                f'WHERE s.event_id = %s AND s.number = {Seat._meta.db_table}.number) '
+                f'WHERE event_id = %s AND number IN ('
+                f"SELECT number FROM {Seat._meta.db_table} WHERE event_id = %s AND description <> '')",
+                [source.pk, event.pk, source.pk],
+            )
+
+        dishes_table = (ArchivedOrderedDish if source.is_archived else OrderedDish)._meta.db_table
+        cursor.execute(
+            f'INSERT INTO {OrderedDish._meta.db_table} (user_id, dish_id, amount, event_id, updated_at) '
+            f'SELECT %s, dish_id, amount, %s, %s FROM {dishes_table} WHERE event_id = %s',
+            [user.pk, event.pk, now, source.pk],
+        )
+
+        if include_guests:
+            if source.is_archived:
+                guests_sql = f'FROM {ArchivedGuest._meta.db_table} g'
+                number = 'g.seat_number'
+            else:
+                guests_sql = f'FROM {Guest._meta.db_table} g LEFT JOIN {Seat._meta.db_table} s ON s.id = g.seat_id'
+                number = 's.number'
+            cursor.execute(
+                f'INSERT INTO {Guest._meta.db_table} '
+                f'(user_id, event_id, first_name, last_name, email, seat_id, version, updated_at) '
+                f'SELECT %s, %s, g.first_name, g.last_name, g.email, ns.id, 0, %s {guests_sql} '
+                f'LEFT JOIN {Seat._meta.db_table} ns ON ns.event_id = %s AND ns.number = {number} '
+                f'WHERE g.event_id = %s',
+                [user.pk, event.pk, now, event.pk, source.pk],
+            )
+            Seat.objects.filter(
+                id__in=Guest.objects.filter(event=event, seat__isnull=False).values('seat_id')
+            ).update(is_engaged=True, updated_at=timezone.now())
+    return event
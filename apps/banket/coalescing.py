@@ -0,0 +1,61 @@
+import threading
+
+from django.conf import settings
+
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs a function once per key at a time: callers that arrive while the
+    first one is still running wait for it and share its result (or error)
+    instead of issuing the same queries again. Only in-flight calls are
+    shared; nothing is cached once the call returns.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as error:
+                call.error = error
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(request, func):
+    """
+    Shares the response data of identical concurrent reads: same path, query
+    string and user. The data is shared between responses and must not be
+    mutated.
+    """
+    if not settings.REQUEST_COALESCING:
+        return func()
+    user_id = request.user.pk if request.user and request.user.is_authenticated else None
+    return single_flight.do((request.get_full_path(), user_id), func)
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from itertools import count
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.banket.layout import build_layout
+from apps.banket.models import Hole, Event, Dish, OrderedDish, Guest, Seat, AdditionalOptions, Comment
+
+sequence = count(1)
+
+
+def create_user(**kwargs):
+    n = next(sequence)
+    email = kwargs.pop('email', f'user{n}-{uuid4().hex[:8]}@example.com')
+    kwargs.setdefault('first_name', f'First{n}')
+    kwargs.setdefault('last_name', f'Last{n}')
+    return User.objects.create_user(email, email, kwargs.pop('password', 'Banket-pass-123'), **kwargs)
+
+
+def get_auth_header(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+def create_hall(seats=300, **kwargs):
+    kwargs.setdefault('name', f'Hall {next(sequence)}')
+    return Hole.objects.create(number_of_seats=seats, **kwargs)
+
+
+def create_layout_hall(zones=2, tables=5, seats_per_table=10, **kwargs):
+    hall = create_hall(seats=0, **kwargs)
+    build_layout(hall, [
+        {
+            'name': f'Zone {z}',
+            'tables': [
+                {'name': f'Table {z}.{t}', 'x': t * 3.0, 'y': z * 3.0, 'seats': seats_per_table}
+                for t in range(tables)
+            ],
+        } for z in range(zones)
+    ])
+    return hall
+
+
+def create_menu(dishes=20, options=5):
+    dish_types = [dish_type for dish_type, _ in Dish.DISH_TYPES]
+    menu = Dish.objects.bulk_create([
+        Dish(name=f'Dish {i}', price=10.0 + i, description=f'Dish number {i}', dish_type=dish_types[i % len(dish_types)])
+        for i in range(dishes)
+    ])
+    extras = AdditionalOptions.objects.bulk_create([
+        AdditionalOptions(name=f'Option {i}', price=100.0 + i) for i in range(options)
+    ])
+    return menu, extras
+
+
+def create_event(user, hall, guests=200, dishes=(), options=(), days_ahead=None, **kwargs):
+    if days_ahead is None:
+        days_ahead = next(sequence)
+    event = Event.objects.create(user=user, hole=hall, date_planned=date.today() + timedelta(days=days_ahead), **kwargs)
+    if options:
+        event.add_options.add(*options)
+
+    seats = list(Seat.objects.filter(event=event).order_by('id')[:guests])
+    Seat.objects.filter(id__in=[seat.id for seat in seats]).update(is_engaged=True)
+    Guest.objects.bulk_create([
+        Guest(
+            user=user,
+            event=event,
+            seat=seat,
+            first_name=f'Guest{i}',
+            last_name=f'Family{i // 4}',
+            email=f'guest{i}@example.com',
+        ) for i, seat in enumerate(seats)
+    ])
+    OrderedDish.objects.bulk_create([
+        OrderedDish(user=user, event=event, dish=dish, amount=guests) for dish in dishes
+    ])
+    return event
+
+
+def create_comments(user, amount=50):
+    return Comment.objects.bulk_create([Comment(user=user, text=f'Comment {i}') for i in range(amount)])
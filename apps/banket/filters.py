@@ -0,0 +1,33 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = 'simple'
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Ranks results against the model's `search_vector` column on PostgreSQL.
+    Views may list `trigram_search_fields` for fuzzy matching on short text.
+    Other backends fall back to the regular `search_fields` lookups.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms or connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        condition = Q(search_vector=query)
+        rank = SearchRank(F('search_vector'), query)
+
+        trigram_fields = getattr(view, 'trigram_search_fields', ())
+        if trigram_fields:
+            for field in trigram_fields:
+                condition |= Q(**{f'{field}__trigram_similar': terms})
+            similarities = [TrigramSimilarity(field, terms) for field in trigram_fields]
+            rank = Greatest(rank, *similarities)
+
+        return queryset.annotate(search_rank=rank).filter(condition).order_by('-search_rank', 'pk')
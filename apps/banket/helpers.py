@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 weekdays = {
     0: 'Monday',
     1: 'Tuesday',
@@ -11,3 +13,23 @@ weekdays = {
 
 def get_weekday_name(weekday):
     return weekdays[weekday]
+
+
+def get_dates_between(date_from, date_to):
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+
+def get_halls_availability(halls, booked, date_from, date_to):
+    booked_by_hall = {}
+    for hole_id, date_planned in booked:
+        booked_by_hall.setdefault(hole_id, set()).add(date_planned)
+
+    dates = get_dates_between(date_from, date_to)
+    return [
+        {
+            'id': hall['id'],
+            'name': hall['name'],
+            'booked': [day for day in dates if day in booked_by_hall.get(hall['id'], ())],
+            'free': [day for day in dates if day not in booked_by_hall.get(hall['id'], ())],
+        } for hall in halls
+    ]
@@ -0,0 +1,113 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from apps.banket.exceptions import Conflict, IdempotencyKeyReused
+from apps.banket.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def get_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def get_expiry():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def get_lease_expiry():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_LEASE)
+
+
+def is_abandoned(record):
+    if record.created_at < get_expiry():
+        return True
+    return record.status_code is None and record.created_at < get_lease_expiry()
+
+
+def reserve_key(user, key, fingerprint):
+    """
+    Claims the key for this request, get_or_create style: returns the record
+    and whether it was created by this call. Otherwise the record is the one
+    stored by the earlier request with the same key. A record older than
+    IDEMPOTENCY_KEY_TTL, or one still without a response after
+    IDEMPOTENCY_IN_PROGRESS_LEASE (its worker died), is dropped and the key
+    reclaimed.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                continue
+            if not is_abandoned(record):
+                return record, False
+            IdempotencyKey.objects.filter(
+                pk=record.pk, created_at=record.created_at, status_code=record.status_code,
+            ).delete()
+    raise Conflict('A request with this Idempotency-Key is already in progress.')
+
+
+def idempotent(view_method):
+    """
+    Makes a mutating view method safe to retry. When the request carries an
+    Idempotency-Key header, the first response for that key is stored and
+    returned again for every retry within IDEMPOTENCY_KEY_TTL instead of
+    repeating the write. A retry that arrives while the first request is
+    still running gets 409 until IDEMPOTENCY_IN_PROGRESS_LEASE has passed,
+    after which the claim is treated as abandoned. Reusing a key for a
+    different request gets 422. Requests without the header are not affected.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({IDEMPOTENCY_HEADER: f'Must be 1 to {MAX_KEY_LENGTH} characters long.'})
+
+        fingerprint = get_fingerprint(request)
+        record, created = reserve_key(request.user, key, fingerprint)
+        if not created:
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyReused()
+            if record.status_code is None:
+                raise Conflict('A request with this Idempotency-Key is already in progress.')
+            return Response(data=record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+        # Scoped to this claim so that a request outliving its lease cannot
+        # overwrite or release the claim of the retry that reclaimed the key.
+        stored = IdempotencyKey.objects.filter(pk=record.pk)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            stored.delete()
+            raise
+        if response.status_code >= 500:
+            stored.delete()
+        else:
+            stored.update(status_code=response.status_code, response=response.data)
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=get_expiry()).delete()
+    return deleted
@@ -0,0 +1,36 @@
+from django.utils import timezone
+
+from apps.banket.archive import archive_events, get_archivable_events
+from apps.banket.idempotency import purge_expired_keys
+from apps.banket.models import Event
+from apps.banket.scheduler import purge_old_runs, register_job
+from apps.banket.sync import purge_expired_tombstones
+
+HOUR = 60 * 60
+
+
+@register_job('mark_passed_events', interval=HOUR)
+def mark_passed_events():
+    return Event.objects.filter(date_planned__lt=timezone.localdate(), is_passed=False).update(
+        is_passed=True, updated_at=timezone.now()
+    )
+
+
+@register_job('archive_passed_events', interval=24 * HOUR)
+def archive_passed_events():
+    return archive_events(get_archivable_events())
+
+
+@register_job('purge_idempotency_keys', interval=HOUR)
+def purge_idempotency_keys():
+    return purge_expired_keys()
+
+
+@register_job('purge_tombstones', interval=24 * HOUR)
+def purge_tombstones():
+    return purge_expired_tombstones()
+
+
+@register_job('purge_job_runs', interval=24 * HOUR)
+def purge_job_runs():
+    return purge_old_runs()
@@ -0,0 +1,140 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.banket.models import Zone, Table, SeatPosition, Seat
+
+LAYOUT_CACHE_PREFIX = 'hall-layout:'
+SEAT_RADIUS = 1.0
+
+
+class LayoutError(Exception):
+    pass
+
+
+def layout_cache_key(hole_id):
+    return f'{LAYOUT_CACHE_PREFIX}{hole_id}'
+
+
+def invalidate_layout(hole_id):
+    cache.delete(layout_cache_key(hole_id))
+
+
+def get_layout(hole_id):
+    """
+    Returns the compact layout of a hall: rows of plain lists instead of
+    objects, so a seat map of a few hundred seats stays a few kilobytes.
+    The payload is cached per hall until its layout changes.
+    """
+    key = layout_cache_key(hole_id)
+    layout = cache.get(key)
+    if layout is None:
+        layout = {
+            'zones': list(Zone.objects.filter(hole_id=hole_id).order_by('id').values_list('id', 'name')),
+            'tables': list(
+                Table.objects.filter(hole_id=hole_id).order_by('id').values_list('id', 'zone_id', 'name', 'x', 'y')
+            ),
+            'seats': list(
+                SeatPosition.objects.filter(hole_id=hole_id).order_by('id').values_list(
+                    'id', 'table_id', 'number', 'x', 'y'
+                )
+            ),
+        }
+        cache.set(key, layout, settings.HALL_LAYOUT_CACHE_TIMEOUT)
+    return layout
+
+
+def sync_rows(model, existing, specs, fields, make):
+    """
+    Updates `existing` rows in order from `specs`, creates the missing ones
+    and deletes the surplus. Returns the rows matching `specs`.
+    """
+    kept = existing[:len(specs)]
+    for row, spec in zip(kept, specs):
+        for field in fields:
+            setattr(row, field, spec[field])
+    model.objects.bulk_update(kept, fields)
+    created = model.objects.bulk_create([make(spec) for spec in specs[len(kept):]])
+    model.objects.filter(pk__in=[row.pk for row in existing[len(specs):]]).delete()
+    return kept + created
+
+
+def build_layout(hole, zones):
+    """
+    Sets the layout of a hall. `zones` is a list of
+    {'name': ..., 'tables': [{'name': ..., 'x': ..., 'y': ..., 'seats': n}]};
+    seats are numbered through the hall and placed in a circle around their
+    table. Events created afterwards get their seats from this layout.
+
+    Zones and tables are updated in place in order and seat positions by
+    number, so the seats of existing events keep their links; seats that
+    move to another table get the new table and a version bump for sync.
+    Removing seat positions still used by an event that has not passed
+    raises LayoutError.
+    """
+    table_specs = [
+        {'zone_index': z, 'name': table['name'], 'x': table.get('x', 0), 'y': table.get('y', 0),
+         'seats': table['seats']}
+        for z, zone in enumerate(zones) for table in zone['tables']
+    ]
+    numbers = {str(i) for i in range(1, sum(table['seats'] for table in table_specs) + 1)}
+
+    with transaction.atomic():
+        positions = {position.number: position for position in hole.seat_positions.select_for_update()}
+        removed = [position.pk for number, position in positions.items() if number not in numbers]
+        if Seat.objects.filter(position_id__in=removed, event__is_passed=False).exists():
+            raise LayoutError('Seats that upcoming events still use cannot be removed from the layout.')
+
+        new_zones = sync_rows(
+            Zone, list(hole.zones.order_by('id')), [{'name': zone['name']} for zone in zones], ['name'],
+            lambda spec: Zone(hole=hole, **spec),
+        )
+        for spec in table_specs:
+            spec['zone'] = new_zones[spec['zone_index']]
+        new_tables = sync_rows(
+            Table, list(hole.tables.order_by('id')), table_specs, ['zone', 'name', 'x', 'y'],
+            lambda spec: Table(hole=hole, zone=spec['zone'], name=spec['name'], x=spec['x'], y=spec['y']),
+        )
+
+        layout, moved = [], {}
+        for table, spec in zip(new_tables, table_specs):
+            for i in range(spec['seats']):
+                angle = 2 * math.pi * i / spec['seats']
+                number = str(len(layout) + 1)
+                position = positions.get(number) or SeatPosition(hole=hole, number=number)
+                if position.pk and position.table_id != table.pk:
+                    moved.setdefault(table.pk, []).append(position.pk)
+                position.table = table
+                position.x = round(table.x + SEAT_RADIUS * math.cos(angle), 3)
+                position.y = round(table.y + SEAT_RADIUS * math.sin(angle), 3)
+                layout.append(position)
+        SeatPosition.objects.bulk_update([position for position in layout if position.pk], ['table', 'x', 'y'])
+        SeatPosition.objects.bulk_create([position for position in layout if not position.pk])
+        SeatPosition.objects.filter(pk__in=removed).delete()
+
+        now = timezone.now()
+        for table_id, position_ids in moved.items():
+            Seat.objects.filter(position_id__in=position_ids).update(
+                table_id=table_id, version=F('version') + 1, updated_at=now
+            )
+
+        hole.number_of_seats = len(layout)
+        hole.save(update_fields=['number_of_seats'])
+    invalidate_layout(hole.id)
+    return new_zones, new_tables, layout
+
+
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Zone)
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+@receiver(post_save, sender=SeatPosition)
+@receiver(post_delete, sender=SeatPosition)
+def drop_cached_layout(sender, instance, **kwargs):
+    invalidate_layout(instance.hole_id)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.banket.archive import ARCHIVE_BATCH_SIZE, archive_events, get_archivable_events
+
+
+class Command(BaseCommand):
+    help = 'Moves seats, guests and ordered dishes of long-passed events into the archive tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.EVENT_RETENTION_DAYS,
+                            help='Archive events that passed more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help='Number of events moved per transaction.')
+
+    def handle(self, *args, **options):
+        events = get_archivable_events(options['days'])
+        count = events.count()
+        removed = archive_events(events, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} events, {removed} rows moved out of the active tables'))
@@ -0,0 +1,80 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.banket.archive import archive_events
+from apps.banket.models import Event, Hole, Seat, Guest
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures active-event read latency as event history grows, with and without archiving. ' \
+           'All data is created inside a transaction that is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', type=int, nargs='+', default=[0, 100, 500, 1000],
+                            help='History sizes (number of passed events) to measure at.')
+        parser.add_argument('--seats', type=int, default=200, help='Seats per hall.')
+        parser.add_argument('--repeat', type=int, default=50, help='Requests per measurement.')
+
+    def handle(self, *args, **options):
+        report = []
+        try:
+            with transaction.atomic():
+                report = self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, options):
+        user = User.objects.create_user('benchmark-archive', 'benchmark-archive@example.com')
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        hall = Hole.objects.create(name='Benchmark hall', number_of_seats=options['seats'])
+        active = Event.objects.create(user=user, hole=hall, date_planned=date.today() + timedelta(days=3650))
+        url = f'/banket/events/{active.id}/event-seats/'
+
+        report = []
+        history = 0
+        for step in sorted(options['steps']):
+            self.create_history(user, hall, history, step)
+            history = step
+            row = {'history_events': history, 'seat_rows': Seat.objects.count()}
+            row['active_ms'] = self.measure(client, url, options['repeat'])
+
+            with transaction.atomic():
+                archive_events(Event.objects.filter(is_passed=True))
+                row['archived_seat_rows'] = Seat.objects.count()
+                row['archived_active_ms'] = self.measure(client, url, options['repeat'])
+                transaction.set_rollback(True)
+            report.append(row)
+        return report
+
+    def create_history(self, user, hall, start, stop):
+        first_day = date(2000, 1, 1)
+        for i in range(start, stop):
+            event = Event.objects.create(user=user, hole=hall, date_planned=first_day + timedelta(days=i), is_passed=True)
+            seats = list(Seat.objects.filter(event=event)[:hall.number_of_seats // 2])
+            Seat.objects.filter(id__in=[seat.id for seat in seats]).update(is_engaged=True)
+            Guest.objects.bulk_create([
+                Guest(user=user, event=event, seat=seat, first_name='Guest', last_name=str(seat.number))
+                for seat in seats
+            ])
+
+    def measure(self, client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {'p50': round(timings[len(timings) // 2], 3), 'p95': round(timings[int(len(timings) * 0.95)], 3)}
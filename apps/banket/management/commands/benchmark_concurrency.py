@@ -0,0 +1,118 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.banket.factories import create_user, create_hall, create_menu, create_event, get_auth_header
+
+ROUTES = (
+    ('dishes-list', lambda ctx: []),
+    ('hole-list', lambda ctx: []),
+    ('hole-detail', lambda ctx: [ctx['hall'].id]),
+    ('events-event-seats', lambda ctx: [ctx['event'].id]),
+    ('events-total-price', lambda ctx: [ctx['event'].id]),
+)
+
+
+class Command(BaseCommand):
+    help = 'Fires identical concurrent reads at the hot routes with request coalescing off and on ' \
+           'and reports latency, throughput and database queries per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help='Threads issuing requests at once.')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per thread and route.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        # The worker threads open their own connections, so a rolled-back
+        # transaction would hide the seed data from them. Everything runs in
+        # a scratch test database instead, dropped afterwards.
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            ctx = self.seed()
+            rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+            report = {}
+            for coalescing in (False, True):
+                with override_settings(REST_FRAMEWORK=rates, REQUEST_COALESCING=coalescing):
+                    report['on' if coalescing else 'off'] = {
+                        name: self.measure(name, args(ctx), ctx['headers'], options['concurrency'], options['requests'])
+                        for name, args in ROUTES
+                    }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def seed(self):
+        user = create_user()
+        hall = create_hall(seats=300)
+        menu, options = create_menu(dishes=50, options=5)
+        event = create_event(user, hall, guests=250, dishes=menu, options=options)
+        return {
+            'user': user,
+            'hall': hall,
+            'menu': menu,
+            'options': options,
+            'event': event,
+            'headers': get_auth_header(user),
+        }
+
+    def measure(self, name, args, headers, concurrency, requests):
+        url = reverse(name, args=args)
+        cache.clear()
+        lock = threading.Lock()
+        queries = []
+        timings = []
+        statuses = set()
+        start = threading.Barrier(concurrency)
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        def worker():
+            client = Client(**headers)
+            local = []
+            start.wait()
+            try:
+                with connection.execute_wrapper(count_query):
+                    for _ in range(requests):
+                        began = time.perf_counter()
+                        response = client.get(url)
+                        local.append(time.perf_counter() - began)
+                        statuses.add(response.status_code)
+            finally:
+                connection.close()
+            with lock:
+                timings.extend(local)
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        elapsed = time.perf_counter() - began
+
+        timings.sort()
+        total = len(timings)
+        return {
+            'requests': total,
+            'statuses': sorted(statuses),
+            'requests_per_second': round(total / elapsed, 1),
+            'p50_ms': round(statistics.median(timings) * 1000, 2),
+            'p95_ms': round(timings[int(total * 0.95) - 1] * 1000, 2),
+            'queries_per_request': round(len(queries) / total, 2),
+        }
@@ -0,0 +1,228 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.analytics import urls as analytics_urls
+from apps.analytics.rollups import refresh_rollups
+from apps.banket import urls as banket_urls
+from apps.banket.factories import create_user, create_hall, create_menu, create_event, create_comments, \
+    get_auth_header, create_layout_hall
+from apps.banket.models import Guest, OrderedDish, Seat
+from apps.users import urls as users_urls
+
+ROUTES = (
+    ('events-list', 'get', lambda ctx, i: [], None),
+    ('events-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'hole': ctx['hall'].id, 'date_planned': str(date(2100, 1, 1) + timedelta(days=i)),
+    }),
+    ('events-detail', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-my-events', 'get', lambda ctx, i: [], None),
+    ('events-event-seats', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-event-guests', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-total-price', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-all-options', 'get', lambda ctx, i: [], None),
+    ('events-add-options', 'patch', lambda ctx, i: [ctx['event'].id], lambda ctx, i: {
+        'add_options': [option.id for option in ctx['options']],
+    }),
+    ('events-delete-options', 'patch', lambda ctx, i: [ctx['event'].id], lambda ctx, i: {
+        'add_options': [ctx['options'][0].id],
+    }),
+    ('events-my-ordered-dishes', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-free-seats', 'get', lambda ctx, i: [ctx['layout_event'].id], lambda ctx, i: {
+        'zone': ctx['layout_hall'].zones.first().id,
+    }),
+    ('events-table-availability', 'get', lambda ctx, i: [ctx['layout_event'].id], None),
+    ('events-seat-map', 'get', lambda ctx, i: [ctx['layout_event'].id], None),
+    ('events-plan-seating', 'post', lambda ctx, i: [ctx['layout_event'].id], lambda ctx, i: {
+        'groups': [{'name': 'Family', 'guest_ids': ctx['planned_guest_ids']}],
+    }),
+    ('events-sync', 'get', lambda ctx, i: [ctx['event'].id], None),
+    ('events-clone', 'post', lambda ctx, i: [ctx['event'].id], lambda ctx, i: {
+        'date_planned': str(date(2200, 1, 1) + timedelta(days=i)), 'include_guests': True,
+    }),
+    ('dishes-list', 'get', lambda ctx, i: [], None),
+    ('comments-list', 'get', lambda ctx, i: [], None),
+    ('comments-list', 'post', lambda ctx, i: [], lambda ctx, i: {'text': f'Benchmark comment {i}'}),
+    ('comments-detail', 'get', lambda ctx, i: [ctx['comment'].id], None),
+    ('ordered-dishes-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'dish': ctx['menu'][0].id, 'amount': 10, 'event': ctx['event'].id,
+    }),
+    ('ordered-dishes-detail', 'get', lambda ctx, i: [ctx['order'].id], None),
+    ('hole-list', 'get', lambda ctx, i: [], None),
+    ('hole-detail', 'get', lambda ctx, i: [ctx['hall'].id], None),
+    ('hole-availability', 'get', lambda ctx, i: [], None),
+    ('hole-hall-availability', 'get', lambda ctx, i: [ctx['hall'].id], None),
+    ('hole-layout', 'get', lambda ctx, i: [ctx['layout_hall'].id], None),
+    ('quotes-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'scenarios': [{
+            'hole': ctx['hall'].id,
+            'guests': 100 + i,
+            'dishes': [{'dish': dish.id} for dish in ctx['menu'][:5]],
+            'options': [option.id for option in ctx['options']],
+        }],
+    }),
+    ('guest-list', 'get', lambda ctx, i: [], None),
+    ('guest-change-seat', 'post', lambda ctx, i: [ctx['guest'].id], lambda ctx, i: {
+        'seat_number': ctx['free_seat_numbers'][i % 2], 'event_id': ctx['event'].id,
+    }),
+    ('guest-make-seat-free', 'get', lambda ctx, i: [ctx['unseated_guest'].id], None),
+    ('guest-bulk-delete', 'post', lambda ctx, i: [], lambda ctx, i: {'ids': [ctx['disposable_guest_ids'][i]]}),
+    ('analytics_summary', 'get', lambda ctx, i: [], lambda ctx, i: {
+        'date_from': str(timezone.localdate()), 'date_to': str(timezone.localdate() + timedelta(days=365)),
+    }, lambda ctx, i: ctx['admin_header']),
+    ('get_profile', 'get', lambda ctx, i: [], None),
+    ('get_users', 'get', lambda ctx, i: [], None),
+    ('token_register', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'email': f'benchmark{i}@example.com', 'password': 'Banket-pass-123', 'first_name': 'Bench', 'last_name': 'Mark',
+    }),
+    ('token_obtain_pair', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'username': ctx['user'].username, 'password': 'Banket-pass-123',
+    }),
+    ('token_refresh', 'post', lambda ctx, i: [], lambda ctx, i: {'refresh': ctx['refresh']}),
+    # Idempotent writes: a fresh key per request measures the claim, a fixed
+    # key measures the replay of the stored response.
+    ('events-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'hole': ctx['hall'].id, 'date_planned': str(date(2300, 1, 1) + timedelta(days=i)),
+    }, lambda ctx, i: {'HTTP_IDEMPOTENCY_KEY': f'benchmark-event-{i}'}),
+    ('guest-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'first_name': 'Bench', 'last_name': f'Guest{i}', 'seat': str(i + 1), 'event': ctx['empty_event'].id,
+    }, lambda ctx, i: {'HTTP_IDEMPOTENCY_KEY': f'benchmark-guest-{i}'}),
+    ('ordered-dishes-list', 'post', lambda ctx, i: [], lambda ctx, i: {
+        'dish': ctx['menu'][1].id, 'amount': 10, 'event': ctx['event'].id,
+    }, lambda ctx, i: {'HTTP_IDEMPOTENCY_KEY': 'benchmark-order'}),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times every banket and users route against seeded data and writes a JSON report. ' \
+           'With --baseline, fails when a route issues more queries or gets slower than allowed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per route.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument('--baseline', help='A previous report to compare against.')
+        parser.add_argument('--max-slowdown', type=float, default=1.5,
+                            help='Allowed p50 ratio against the baseline before a route counts as regressed.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                report = self.run(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                regressions = self.compare(json.load(f), report, options['max_slowdown'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+
+    def seed(self, repeat):
+        user = create_user()
+        hall = create_hall(seats=300)
+        menu, options = create_menu(dishes=20, options=5)
+        event = create_event(user, hall, guests=250, dishes=menu, options=options)
+        for _ in range(10):
+            create_event(user, hall, guests=100, dishes=menu[:5])
+        for _ in range(50):
+            create_user()
+        layout_hall = create_layout_hall(zones=2, tables=5, seats_per_table=10)
+        layout_event = create_event(user, layout_hall, guests=40)
+        disposable_event = create_event(user, create_hall(seats=repeat), guests=repeat)
+        refresh_rollups(timezone.localdate(), timezone.localdate() + timedelta(days=365))
+        guests = Guest.objects.filter(event=event).order_by('id')
+        unseated_guest = guests[1]
+        unseated_guest.seat_free()
+        return {
+            'user': user,
+            'hall': hall,
+            'menu': menu,
+            'options': options,
+            'event': event,
+            'comment': create_comments(user, amount=100)[0],
+            'order': OrderedDish.objects.filter(event=event).first(),
+            'guest': guests[0],
+            'unseated_guest': unseated_guest,
+            'free_seat_numbers': list(
+                Seat.objects.filter(event=event, is_engaged=False).order_by('id').values_list('number', flat=True)[:2]
+            ),
+            'layout_hall': layout_hall,
+            'layout_event': layout_event,
+            'planned_guest_ids': list(
+                Guest.objects.filter(event=layout_event).order_by('id').values_list('id', flat=True)[:8]
+            ),
+            'disposable_guest_ids': list(
+                Guest.objects.filter(event=disposable_event).order_by('id').values_list('id', flat=True)
+            ),
+            'empty_event': create_event(user, create_hall(seats=repeat), guests=0),
+            'refresh': str(RefreshToken.for_user(user)),
+            'admin_header': get_auth_header(create_user(is_staff=True, is_superuser=True)),
+        }
+
+    def run(self, repeat):
+        ctx = self.seed(repeat)
+        client = Client(**get_auth_header(ctx['user']))
+        report = {'routes': {}, 'not_measured': []}
+
+        measured = {name for name, *_ in ROUTES}
+        for pattern in banket_urls.urlpatterns + users_urls.urlpatterns + analytics_urls.urlpatterns:
+            if pattern.name not in measured and pattern.name not in report['not_measured']:
+                report['not_measured'].append(pattern.name)
+
+        for name, method, get_args, get_data, *get_headers in ROUTES:
+            cache.clear()
+            client.get(reverse('get_profile'))
+            timings = []
+            for i in range(repeat):
+                url = reverse(name, args=get_args(ctx, i))
+                data = get_data(ctx, i) if get_data else None
+                headers = get_headers[0](ctx, i) if get_headers else {}
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, data=data, content_type='application/json', **headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            route = f'{method.upper()} {name}'
+            if 'HTTP_IDEMPOTENCY_KEY' in headers:
+                route += ' (Idempotency-Key)'
+            report['routes'][route] = {
+                'status': response.status_code,
+                'queries': len(queries),
+                'p50_ms': round(timings[len(timings) // 2], 3),
+                'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+                'mean_ms': round(sum(timings) / len(timings), 3),
+            }
+        return report
+
+    def compare(self, baseline, report, max_slowdown):
+        regressions = []
+        for route, before in baseline['routes'].items():
+            after = report['routes'].get(route)
+            if after is None:
+                continue
+            if after['queries'] > before['queries']:
+                regressions.append(f'{route}: {before["queries"]} -> {after["queries"]} queries')
+            if after['p50_ms'] > before['p50_ms'] * max_slowdown:
+                regressions.append(f'{route}: p50 {before["p50_ms"]} -> {after["p50_ms"]} ms')
+        return regressions
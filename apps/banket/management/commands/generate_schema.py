@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = 'Generates the OpenAPI document once and writes it to OPENAPI_SCHEMA_PATH, from where it is served. ' \
+           'Runs at image build time; needs drf_yasg.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_PATH, help='File to write the schema to.')
+        parser.add_argument('--validate', action='store_true',
+                            help='Validate the document with swagger-spec-validator (CI only).')
+
+    def handle(self, *args, **options):
+        try:
+            content = generate_schema(validate=options['validate'])
+        except ImportError as error:
+            raise CommandError(
+                f'{error}. The schema is generated with the development requirements (requirements.txt); '
+                f'production images get it from the Dockerfile schema stage.'
+            )
+        os.makedirs(os.path.dirname(options['output']) or '.', exist_ok=True)
+        with open(options['output'], 'wb') as f:
+            f.write(content)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(content)} bytes to {options["output"]}'))
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from uuid import uuid4
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+ID_PATTERN = re.compile(r'/\d+(?=/|$)')
+PASSWORD = 'Banket-load-123'
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Stats:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def record(self, method, path, duration, ok):
+        endpoint = f'{method} {ID_PATTERN.sub("/{id}", path.split("?")[0])}'
+        self.timings[endpoint].append(duration)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        endpoints = {}
+        for endpoint, timings in sorted(self.timings.items()):
+            timings.sort()
+            endpoints[endpoint] = {
+                'requests': len(timings),
+                'throughput_rps': round(len(timings) / elapsed, 2),
+                'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+                'error_rate': round(self.errors[endpoint] / len(timings), 4),
+            }
+        total = sum(len(timings) for timings in self.timings.values())
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(sum(self.errors.values()) / total, 4) if total else 0,
+            'endpoints': endpoints,
+        }
+
+
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = time.perf_counter()
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.perf_counter()
+            delay = self.next_slot - now
+            self.next_slot = max(self.next_slot, now) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Client:
+    def __init__(self, base_url, stats, limiter, executor):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.limiter = limiter
+        self.executor = executor
+        self.session = requests.Session()
+        self.token = None
+
+    async def request(self, method, path, body=None, headers=None):
+        await self.limiter.wait()
+        headers = dict(headers or {})
+        if self.token:
+            headers.setdefault('Authorization', f'Bearer {self.token}')
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(self.executor, lambda: self.session.request(
+                method, self.base_url + path, json=body, headers=headers, timeout=30,
+            ))
+        except requests.RequestException:
+            self.stats.record(method, path, time.perf_counter() - start, False)
+            return None
+        self.stats.record(method, path, time.perf_counter() - start, response.status_code < 400)
+        return response
+
+
+class Planner:
+    """
+    A synthetic user: signs up, creates an event and then keeps seating
+    guests, ordering dishes and checking prices.
+    """
+
+    def __init__(self, client, email=None, password=None):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.event_id = None
+        self.next_seat = 1
+        self.seats = 0
+        self.dishes = []
+
+    async def login(self):
+        if not self.email:
+            self.email = f'load-{uuid4().hex[:12]}@example.com'
+            self.password = PASSWORD
+            await self.client.request('POST', '/users/register/', {
+                'email': self.email, 'password': self.password, 'first_name': 'Load', 'last_name': 'Test',
+            })
+        response = await self.client.request('POST', '/users/token/', {
+            'username': self.email, 'password': self.password,
+        })
+        if response is None or response.status_code != 200:
+            raise CommandError(f'Could not obtain a token for {self.email}')
+        self.client.token = response.json()['access']
+
+        response = await self.client.request('GET', '/banket/dishes/')
+        if response is not None and response.status_code == 200:
+            self.dishes = [dish['id'] for dish in response.json()]
+
+    async def create_event(self):
+        response = await self.client.request('GET', '/banket/hole/')
+        halls = response.json()['results'] if response is not None and response.status_code == 200 else []
+        if not halls:
+            return
+        hall = random.choice(halls)
+        response = await self.client.request('POST', '/banket/events/', {
+            'hole': hall['id'],
+            'event_type': random.choice(['BIRTHDAY', 'WEDDING', 'CHRISTENING', 'OTHER']),
+            'date_planned': str(date.today() + timedelta(days=random.randint(1, 365 * 50))),
+        })
+        if response is not None and response.status_code == 201:
+            self.event_id = response.json()['id']
+            self.next_seat = 1
+            self.seats = hall['number_of_seats']
+
+    async def seat_guest(self):
+        if self.next_seat > self.seats:
+            return await self.create_event()
+        await self.client.request('POST', '/banket/guest/', {
+            'first_name': 'Guest', 'last_name': str(self.next_seat), 'seat': str(self.next_seat), 'event': self.event_id,
+        })
+        self.next_seat += 1
+
+    async def order_dish(self):
+        if self.dishes:
+            await self.client.request('POST', '/banket/order/', {
+                'dish': random.choice(self.dishes), 'amount': random.randint(1, 50), 'event': self.event_id,
+            })
+
+    async def check_price(self):
+        await self.client.request('GET', f'/banket/events/{self.event_id}/total-price/')
+
+    async def view_seats(self):
+        await self.client.request('GET', f'/banket/events/{self.event_id}/event-seats/')
+
+    async def view_events(self):
+        await self.client.request('GET', '/banket/events/my-events/')
+
+    async def step(self):
+        if self.event_id is None:
+            return await self.create_event()
+        action = random.choices(
+            [self.seat_guest, self.order_dish, self.check_price, self.view_seats, self.view_events, self.create_event],
+            weights=[40, 20, 15, 15, 8, 2],
+        )[0]
+        await action()
+
+
+class Command(BaseCommand):
+    help = 'Generates load against a running server by replaying a JSON-lines request log ' \
+           'or by simulating planners, and reports throughput, latency percentiles and error rates per endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the server under test.')
+        parser.add_argument('--replay', help='JSON-lines file with "method", "path" and optional "body"/"headers".')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent virtual clients.')
+        parser.add_argument('--rate', type=float, default=0, help='Overall requests per second (0 = unlimited).')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run the synthetic mix for.')
+        parser.add_argument('--email', help='Existing account to use instead of registering one per client.')
+        parser.add_argument('--password', help='Password of --email.')
+        parser.add_argument('--output', help='Write the JSON report to this file as well.')
+
+    def handle(self, *args, **options):
+        report = asyncio.run(self.run(options))
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    async def run(self, options):
+        stats = Stats()
+        limiter = RateLimiter(options['rate'])
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            clients = [Client(options['url'], stats, limiter, executor) for _ in range(options['concurrency'])]
+            if options['replay']:
+                await self.replay(options['replay'], clients, options)
+            else:
+                deadline = time.perf_counter() + options['duration']
+                await asyncio.gather(*[self.simulate(client, deadline, options) for client in clients])
+        return stats.report()
+
+    async def replay(self, path, clients, options):
+        with open(path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        entries = [entry for entry in entries if 'method' in entry and 'path' in entry]
+        if not entries:
+            raise CommandError(f'{path} contains no entries with "method" and "path"')
+
+        if options['email']:
+            for client in clients:
+                await Planner(client, options['email'], options['password']).login()
+
+        queue = asyncio.Queue()
+        for entry in entries:
+            queue.put_nowait(entry)
+
+        async def consume(client):
+            while not queue.empty():
+                entry = queue.get_nowait()
+                await client.request(entry['method'].upper(), entry['path'], entry.get('body'), entry.get('headers'))
+
+        await asyncio.gather(*[consume(client) for client in clients])
+
+    async def simulate(self, client, deadline, options):
+        planner = Planner(client, options['email'], options['password'])
+        await planner.login()
+        while time.perf_counter() < deadline:
+            await planner.step()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.banket.scheduler import jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Runs a single scheduler job immediately, whether or not it is due.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='One of the registered jobs.')
+
+    def handle(self, *args, **options):
+        if options['name'] not in jobs:
+            raise CommandError(f'Unknown job "{options["name"]}". Available: {", ".join(sorted(jobs))}')
+        run = run_job(options['name'])
+        if not run.succeeded:
+            raise CommandError(f'{run.name} failed after {run.duration:.3f}s\n{run.error}')
+        self.stdout.write(self.style.SUCCESS(f'{run.name}: {run.rows_affected} rows in {run.duration:.3f}s'))
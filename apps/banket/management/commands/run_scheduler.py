@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.banket.scheduler import run_due_jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs periodic banket jobs (marking and archiving passed events) whenever they are due.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the due jobs once and exit.')
+        parser.add_argument('--tick', type=int, default=settings.SCHEDULER_TICK,
+                            help='Seconds to sleep between checks for due jobs.')
+
+    def handle(self, *args, **options):
+        while True:
+            # Like Django does around every request, so a long-running loop
+            # does not keep using a connection that is stale or was broken by
+            # a database restart.
+            close_old_connections()
+            for run in run_due_jobs():
+                self.report(run)
+            if options['once']:
+                break
+            time.sleep(options['tick'])
+
+    def report(self, run):
+        if run.succeeded:
+            self.stdout.write(self.style.SUCCESS(
+                f'{run.name}: {run.rows_affected} rows in {run.duration:.3f}s'
+            ))
+        else:
+            self.stderr.write(self.style.ERROR(f'{run.name} failed after {run.duration:.3f}s\n{run.error}'))
@@ -0,0 +1,65 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:09
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0006_hole_description_alter_image_hole'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdditionalOptions',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(default='')),
+                ('price', models.FloatField(validators=[django.core.validators.MinValueValidator(0.0)])),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='event_type',
+            field=models.CharField(choices=[('BIRTHDAY', 'Birthday'), ('WEDDING', 'Wedding'), ('CHRISTENING', 'Сhristening'), ('OTHER', 'Other')], default='OTHER', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='guest',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='guest',
+            name='event',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='event', to='banket.event'),
+        ),
+        migrations.AlterField(
+            model_name='guest',
+            name='seat',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat', to='banket.seat'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'date_planned'], name='banket_even_user_id_a881f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['user', 'event'], name='banket_gues_user_id_042040_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordereddish',
+            index=models.Index(fields=['user', 'event'], name='banket_orde_user_id_b6dcc9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['event', 'number'], name='banket_seat_event_i_7902db_idx'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='add_options',
+            field=models.ManyToManyField(to='banket.additionaloptions'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from apps.banket.operations import PostgresOnly
+
+SEARCH_TRIGGERS = (
+    ('banket_event', ('description', 'event_type')),
+    ('banket_dish', ('name', 'description', 'dish_type')),
+    ('banket_comment', ('text',)),
+)
+
+
+def search_trigger_sql(table, columns):
+    columns_sql = ', '.join(columns)
+    document_sql = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return [
+        f"CREATE TRIGGER {table}_search_update BEFORE INSERT OR UPDATE OF {columns_sql} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.simple', {columns_sql});",
+        f"UPDATE {table} SET search_vector = to_tsvector('pg_catalog.simple', {document_sql});",
+    ]
+
+
+def drop_search_trigger_sql(table):
+    return [f"DROP TRIGGER IF EXISTS {table}_search_update ON {table};"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0007_owner_scoped_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='dish',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgresOnly(migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='banket_comment_search_idx'),
+        )),
+        PostgresOnly(migrations.AddIndex(
+            model_name='dish',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='banket_dish_search_idx'),
+        )),
+        PostgresOnly(migrations.AddIndex(
+            model_name='dish',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='banket_dish_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        )),
+        PostgresOnly(migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='banket_event_search_idx'),
+        )),
+    ] + [
+        PostgresOnly(migrations.RunSQL(search_trigger_sql(table, columns), drop_search_trigger_sql(table)))
+        for table, columns in SEARCH_TRIGGERS
+    ]
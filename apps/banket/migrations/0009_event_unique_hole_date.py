@@ -0,0 +1,47 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def release_duplicate_bookings(apps, schema_editor):
+    """
+    Events used to be saved with the default hall whatever was requested, so
+    an existing database can hold several events for one hall and date. The
+    earliest event keeps the booking; the others are detached from the hall
+    (hole = NULL, which the constraint allows) and listed so they can be
+    re-booked by hand.
+    """
+    Event = apps.get_model('banket', 'Event')
+    duplicates = (
+        Event.objects.using(schema_editor.connection.alias)
+        .filter(hole__isnull=False, date_planned__isnull=False)
+        .values('hole_id', 'date_planned')
+        .annotate(count=Count('id'), keep=Min('id'))
+        .filter(count__gt=1)
+    )
+    for booking in duplicates:
+        released = Event.objects.using(schema_editor.connection.alias).filter(
+            hole_id=booking['hole_id'], date_planned=booking['date_planned'],
+        ).exclude(pk=booking['keep'])
+        ids = list(released.values_list('id', flat=True))
+        released.update(hole=None)
+        print(
+            f'\n  Hall {booking["hole_id"]} was booked more than once on {booking["date_planned"]}: '
+            f'kept event {booking["keep"]}, detached events {ids} from the hall.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0008_search_vectors'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('hole', 'date_planned'), name='banket_event_unique_hole_date'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0009_event_unique_hole_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField(default=0.0)),
+                ('rows_affected', models.PositiveIntegerField(default=0)),
+                ('succeeded', models.BooleanField(default=True)),
+                ('error', models.TextField(default='')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_passed', False)), fields=['date_planned'], name='banket_event_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobrun',
+            index=models.Index(fields=['name', '-started_at'], name='banket_jobr_name_be0578_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('banket', '0010_jobrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ArchivedSeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('number', models.CharField(max_length=10)),
+                ('description', models.TextField(default='')),
+                ('is_engaged', models.BooleanField(default=False)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_seats', to='banket.event')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderedDish',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('amount', models.PositiveIntegerField(default=0)),
+                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='banket.dish')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_dishes', to='banket.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedGuest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('seat_number', models.CharField(max_length=10, null=True)),
+                ('event', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_guests', to='banket.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
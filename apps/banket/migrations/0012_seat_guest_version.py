@@ -0,0 +1,23 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0011_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0012_seat_guest_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=10)),
+                ('x', models.FloatField(default=0)),
+                ('y', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Table',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('x', models.FloatField(default=0)),
+                ('y', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Zone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='hole',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zones', to='banket.hole'),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='hole',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tables', to='banket.hole'),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='zone',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tables', to='banket.zone'),
+        ),
+        migrations.AddField(
+            model_name='seatposition',
+            name='hole',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_positions', to='banket.hole'),
+        ),
+        migrations.AddField(
+            model_name='seatposition',
+            name='table',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seat_positions', to='banket.table'),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='position',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seats', to='banket.seatposition'),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='table',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seats', to='banket.table'),
+        ),
+        migrations.AddIndex(
+            model_name='table',
+            index=models.Index(fields=['hole', 'zone'], name='banket_tabl_hole_id_1a8c3d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='seatposition',
+            constraint=models.UniqueConstraint(fields=('hole', 'number'), name='banket_seatposition_unique_number'),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(condition=models.Q(('is_engaged', False)), fields=['event', 'table'], name='banket_seat_free_table_idx'),
+        ),
+    ]
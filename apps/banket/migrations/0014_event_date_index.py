@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0013_hall_layout'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date_planned'], name='banket_event_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('banket', '0014_event_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='banket_comment_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.1.1 on 2026-10-19 19:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0016_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('guest', 'Guest'), ('ordered_dish', 'Ordered dish')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='ordereddish',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['event', 'updated_at'], name='banket_guest_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordereddish',
+            index=models.Index(fields=['event', 'updated_at'], name='banket_ordereddish_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['event', 'updated_at'], name='banket_seat_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='banket.event'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['event', 'deleted_at'], name='banket_tombstone_sync_idx'),
+        ),
+    ]
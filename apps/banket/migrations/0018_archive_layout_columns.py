@@ -0,0 +1,34 @@
+# Generated by Django 4.1.1 on 2026-10-19 20:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banket', '0017_sync_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedguest',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedseat',
+            name='position',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='banket.seatposition'),
+        ),
+        migrations.AddField(
+            model_name='archivedseat',
+            name='table',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='banket.table'),
+        ),
+        migrations.AddField(
+            model_name='archivedseat',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
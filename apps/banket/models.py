@@ -1,9 +1,14 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import Sum
-from django.db.models.signals import post_save, pre_delete
+from django.db import connections, models, transaction
+from django.db.models import Sum, Count, F, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
 class Dish(models.Model):
@@ -19,6 +24,13 @@ class Dish(models.Model):
     price = models.FloatField(validators=[MinValueValidator(0.0)])
     description = models.TextField(default='Dish')
     dish_type = models.CharField(max_length=255, choices=DISH_TYPES)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='banket_dish_search_idx'),
+            GinIndex(fields=['name'], name='banket_dish_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -33,6 +45,46 @@ class Hole(models.Model):
         return f'{self.name}'
 
 
+class Zone(models.Model):
+    hole = models.ForeignKey(Hole, related_name='zones', on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f'{self.hole.name} - {self.name}'
+
+
+class Table(models.Model):
+    hole = models.ForeignKey(Hole, related_name='tables', on_delete=models.CASCADE)
+    zone = models.ForeignKey(Zone, related_name='tables', on_delete=models.SET_NULL, null=True, blank=True)
+    name = models.CharField(max_length=255)
+    x = models.FloatField(default=0)
+    y = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['hole', 'zone']),
+        ]
+
+    def __str__(self):
+        return f'{self.hole.name} - {self.name}'
+
+
+class SeatPosition(models.Model):
+    hole = models.ForeignKey(Hole, related_name='seat_positions', on_delete=models.CASCADE)
+    table = models.ForeignKey(Table, related_name='seat_positions', on_delete=models.SET_NULL, null=True, blank=True)
+    number = models.CharField(max_length=10)
+    x = models.FloatField(default=0)
+    y = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hole', 'number'], name='banket_seatposition_unique_number'),
+        ]
+
+    def __str__(self):
+        return self.number
+
+
 class Image(models.Model):
     hole = models.ForeignKey(Hole, related_name='images', on_delete=models.CASCADE, null=True)
     image = models.ImageField(upload_to='media/')
@@ -44,6 +96,14 @@ class Image(models.Model):
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='banket_comment_search_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='banket_comment_feed_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username}'
@@ -58,6 +118,29 @@ class AdditionalOptions(models.Model):
         return f'{self.name} - {self.price} lei'
 
 
+def event_subquery(queryset, aggregate, output_field):
+    subquery = queryset.filter(
+        event=OuterRef('pk')
+    ).order_by().values('event').annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(subquery, output_field=output_field), Value(0), output_field=output_field)
+
+
+class EventQuerySet(models.QuerySet):
+    def with_totals(self):
+        dishes_price = Sum(F('amount') * F('dish__price'))
+        return self.annotate(
+            total_guests=(
+                event_subquery(Guest.objects.all(), Count('id'), IntegerField())
+                + event_subquery(ArchivedGuest.objects.all(), Count('id'), IntegerField())
+            ),
+            total_dishes_price=(
+                event_subquery(OrderedDish.objects.all(), dishes_price, FloatField())
+                + event_subquery(ArchivedOrderedDish.objects.all(), dishes_price, FloatField())
+            ),
+            total_options_price=event_subquery(AdditionalOptions.objects.all(), Sum('price'), FloatField()),
+        )
+
+
 class Event(models.Model):
     EVENT_TYPES = (
         ('BIRTHDAY', 'Birthday'),
@@ -73,7 +156,23 @@ class Event(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_planned = models.DateField(null=True)
     is_passed = models.BooleanField(default=False)
+    is_archived = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
     add_options = models.ManyToManyField(AdditionalOptions)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date_planned']),
+            models.Index(fields=['date_planned'], name='banket_event_date_idx'),
+            GinIndex(fields=['search_vector'], name='banket_event_search_idx'),
+            models.Index(fields=['date_planned'], condition=models.Q(is_passed=False), name='banket_event_pending_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['hole', 'date_planned'], name='banket_event_unique_hole_date'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.event_type}'
@@ -91,10 +190,22 @@ class OrderedDish(models.Model):
     dish = models.ForeignKey(Dish, on_delete=models.CASCADE)
     amount = models.PositiveIntegerField(default=0)
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'event']),
+            models.Index(fields=['event', 'updated_at'], name='banket_ordereddish_sync_idx'),
+        ]
 
     def __str__(self):
         return f'{self.dish.name}'
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            Tombstone.objects.create(event_id=self.event_id, model=Tombstone.ORDERED_DISH, object_id=self.pk)
+            return super().delete(*args, **kwargs)
+
     @property
     def calculate_price(self):
         return self.dish.price * self.amount
@@ -106,19 +217,47 @@ class Seat(models.Model):
     number = models.CharField(max_length=10)
     description = models.TextField(default='')
     is_engaged = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=0)
+    position = models.ForeignKey(SeatPosition, related_name='seats', on_delete=models.SET_NULL, null=True, blank=True)
+    table = models.ForeignKey(Table, related_name='seats', on_delete=models.SET_NULL, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'number']),
+            models.Index(fields=['event', 'updated_at'], name='banket_seat_sync_idx'),
+            models.Index(
+                fields=['event', 'table'], name='banket_seat_free_table_idx', condition=models.Q(is_engaged=False)
+            ),
+        ]
 
     def __str__(self):
         return self.number
 
     def take_the_place(self):
         self.is_engaged = True
+        self.version += 1
         self.save()
 
     def make_free(self):
         self.is_engaged = False
+        self.version += 1
         self.save()
 
 
+class GuestQuerySet(models.QuerySet):
+    def free_seats(self):
+        return Seat.objects.filter(
+            id__in=self.filter(seat__isnull=False).values('seat_id')
+        ).update(is_engaged=False, version=F('version') + 1, updated_at=timezone.now())
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            self.free_seats()
+            Tombstone.record(Tombstone.GUEST, self.filter(event__isnull=False))
+            return super().delete()
+
+
 class Guest(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     first_name = models.CharField(max_length=100)
@@ -126,27 +265,176 @@ class Guest(models.Model):
     email = models.EmailField(blank=True, null=True)
     seat = models.OneToOneField(Seat, related_name='seat', on_delete=models.CASCADE, null=True)
     event = models.ForeignKey(Event, related_name='event', on_delete=models.CASCADE, null=True)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = GuestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'event']),
+            models.Index(fields=['event', 'updated_at'], name='banket_guest_sync_idx'),
+        ]
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.seat_id:
+                Seat.objects.filter(pk=self.seat_id).update(
+                    is_engaged=False, version=F('version') + 1, updated_at=timezone.now()
+                )
+            if self.event_id:
+                Tombstone.objects.create(event_id=self.event_id, model=Tombstone.GUEST, object_id=self.pk)
+            return super().delete(*args, **kwargs)
+
     def seat_free(self):
-        self.seat.make_free()
+        if self.seat_id:
+            self.seat.make_free()
         self.seat = None
+        self.version += 1
         self.save()
 
 
-@receiver(post_save, sender=Event)
-def create_seats(sender, instance, created, **kwargs):
-    if created:
+class ArchivedSeat(models.Model):
+    original_id = models.BigIntegerField()
+    event = models.ForeignKey(Event, related_name='archived_seats', on_delete=models.CASCADE)
+    number = models.CharField(max_length=10)
+    description = models.TextField(default='')
+    is_engaged = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=0)
+    position = models.ForeignKey(SeatPosition, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    table = models.ForeignKey(Table, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+
+    def __str__(self):
+        return self.number
+
+
+class ArchivedGuest(models.Model):
+    original_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, related_name='archived_guests', on_delete=models.CASCADE, null=True)
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    email = models.EmailField(blank=True, null=True)
+    seat_number = models.CharField(max_length=10, null=True)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.first_name} {self.last_name}'
+
+
+class ArchivedOrderedDish(models.Model):
+    original_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    dish = models.ForeignKey(Dish, on_delete=models.CASCADE)
+    amount = models.PositiveIntegerField(default=0)
+    event = models.ForeignKey(Event, related_name='archived_dishes', on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f'{self.dish_id} x {self.amount}'
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of a guest or ordered dish so that incremental sync
+    clients can drop it. Rows removed together with their event (deletion or
+    archiving) are not recorded: the event itself tells the client.
+    """
+    GUEST = 'guest'
+    ORDERED_DISH = 'ordered_dish'
+    MODELS = (
+        (GUEST, 'Guest'),
+        (ORDERED_DISH, 'Ordered dish'),
+    )
+
+    event = models.ForeignKey(Event, related_name='tombstones', on_delete=models.CASCADE)
+    model = models.CharField(max_length=20, choices=MODELS)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'deleted_at'], name='banket_tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+    @classmethod
+    def record(cls, model, queryset):
+        """Records a tombstone for every row of `queryset` with one INSERT ... SELECT."""
+        connection = connections[queryset.db]
+        select_sql, params = queryset.order_by().values('event_id', 'id').query.get_compiler(queryset.db).as_sql()
+        deleted_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {cls._meta.db_table} (event_id, object_id, model, deleted_at) '
+                f'SELECT deleted.event_id, deleted.id, %s, %s FROM ({select_sql}) deleted',
+                [model, deleted_at, *params],
+            )
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='banket_idempotency_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='banket_idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.key} - {self.status_code}'
+
+
+class JobRun(models.Model):
+    name = models.CharField(max_length=100)
+    started_at = models.DateTimeField()
+    duration = models.FloatField(default=0.0)
+    rows_affected = models.PositiveIntegerField(default=0)
+    succeeded = models.BooleanField(default=True)
+    error = models.TextField(default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} - {self.started_at}'
+
+
+def create_event_seats(event):
+    positions = SeatPosition.objects.filter(hole_id=event.hole_id).values_list('id', 'table_id', 'number')
+    if positions:
         Seat.objects.bulk_create(
             [Seat(
-                event=instance,
-                number=i
-            ) for i in range(1, instance.hole.number_of_seats + 1)]
+                event=event,
+                number=number,
+                position_id=position_id,
+                table_id=table_id,
+            ) for position_id, table_id, number in positions]
         )
+        return
+    Seat.objects.bulk_create(
+        [Seat(
+            event=event,
+            number=i
+        ) for i in range(1, event.hole.number_of_seats + 1)]
+    )
 
 
-@receiver(pre_delete, sender=Guest)
-def delete_seat(sender, instance, *args, **kwargs):
-    instance.seat.make_free()
+@receiver(post_save, sender=Event)
+def create_seats(sender, instance, created, **kwargs):
+    if created:
+        create_event_seats(instance)
+
@@ -0,0 +1,32 @@
+from django.db.migrations.operations.base import Operation
+
+
+class PostgresOnly(Operation):
+    """
+    Wraps a migration operation so that its database side only runs on
+    PostgreSQL, while the migration state is updated on every backend.
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    @property
+    def reversible(self):
+        return self.operation.reversible
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f'{self.operation.describe()} (PostgreSQL only)'
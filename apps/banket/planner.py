@@ -0,0 +1,153 @@
+import bisect
+import re
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.banket.exceptions import Conflict
+from apps.banket.models import Guest, Seat
+
+DEFAULT_TABLE_SIZE = 10
+DIGITS = re.compile(r'\d+')
+
+
+class SeatingError(Exception):
+    pass
+
+
+def seat_sort_key(number):
+    match = DIGITS.search(number)
+    return (int(match.group()) if match else float('inf'), number)
+
+
+def group_seats_by_table(seats, table_size=DEFAULT_TABLE_SIZE):
+    """
+    Splits the free seats of an event, given as (id, number, table_id)
+    rows, into tables. Seats from a hall layout keep their table; without
+    one the seats are numbered 1..N, so every `table_size` consecutive
+    numbers form one virtual table.
+    """
+    tables = {}
+    for seat_id, number, table_id in sorted(seats, key=lambda seat: seat_sort_key(seat[1])):
+        if table_id is not None:
+            key = ('table', table_id)
+        else:
+            index, _ = seat_sort_key(number)
+            key = (index - 1) // table_size if index != float('inf') else number
+        tables.setdefault(key, []).append((seat_id, number))
+    return tables
+
+
+class Table:
+    def __init__(self, key, seats):
+        self.key = key
+        self.seats = seats
+        self.groups = set()
+
+    @property
+    def free(self):
+        return len(self.seats)
+
+    def take(self, amount, group):
+        taken, self.seats = self.seats[:amount], self.seats[amount:]
+        self.groups.add(group)
+        return taken
+
+
+def plan_seating(tables, groups, apart=()):
+    """
+    Assigns groups to tables with best-fit decreasing bin packing: the
+    largest groups go first, each to the table with the fewest free seats
+    that still fits it and holds no group it must be kept apart from.
+    Groups that fit no single table are split over the emptiest tables.
+    `groups` is a list of (name, size, keep_together) tuples; returns
+    {name: [(seat_id, number), ...]} or raises SeatingError.
+    """
+    conflicts = {}
+    for first, second in apart:
+        conflicts.setdefault(first, set()).add(second)
+        conflicts.setdefault(second, set()).add(first)
+
+    by_free = sorted((Table(key, seats) for key, seats in tables.items()), key=lambda table: table.free)
+    free_counts = [table.free for table in by_free]
+
+    def allowed(table, name):
+        return not table.groups & conflicts.get(name, set())
+
+    def update(table, old_free):
+        index = bisect.bisect_left(free_counts, old_free)
+        while by_free[index] is not table:
+            index += 1
+        del by_free[index], free_counts[index]
+        position = bisect.bisect_left(free_counts, table.free)
+        by_free.insert(position, table)
+        free_counts.insert(position, table.free)
+
+    assignments = {}
+    for name, size, keep_together in sorted(groups, key=lambda group: -group[1]):
+        seats = []
+        start = bisect.bisect_left(free_counts, size)
+        table = next((table for table in by_free[start:] if allowed(table, name)), None)
+        if table is not None:
+            old_free = table.free
+            seats = table.take(size, name)
+            update(table, old_free)
+        elif keep_together and any(table.free >= size for table in by_free):
+            raise SeatingError(f'Group "{name}" cannot be seated at one table apart from {sorted(conflicts[name])}.')
+        else:
+            for table in reversed(list(by_free)):
+                if len(seats) == size:
+                    break
+                if table.free and allowed(table, name):
+                    old_free = table.free
+                    seats += table.take(size - len(seats), name)
+                    update(table, old_free)
+            if len(seats) < size:
+                raise SeatingError(f'Not enough free seats for group "{name}".')
+        assignments[name] = seats
+    return assignments
+
+
+def apply_seating(event, user, groups, assignments):
+    """
+    Writes a plan in one transaction: creates new guests, moves existing
+    ones, frees the seats they leave and engages every assigned seat with
+    set-based statements. `groups` maps a group name to its existing guests
+    and new (unsaved) Guest instances. Existing guests are locked and
+    checked against the version they were planned with; if any was moved
+    or deleted in the meantime, nothing is written and Conflict (409) is
+    raised.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        existing = [guest for group in groups.values() for guest in group['existing']]
+        guest_ids = [guest.id for guest in existing]
+        versions = dict(Guest.objects.select_for_update().filter(id__in=guest_ids).values_list('id', 'version'))
+        if any(versions.get(guest.id) != guest.version for guest in existing):
+            raise Conflict('Some guests were changed while the plan was being written.')
+        Guest.objects.filter(id__in=guest_ids).free_seats()
+
+        new_guests = []
+        for name, group in groups.items():
+            seats = iter(assignments[name])
+            for guest in group['existing']:
+                guest.seat_id = next(seats)[0]
+                guest.version += 1
+                guest.updated_at = now
+            for guest in group['new']:
+                guest.user = user
+                guest.event = event
+                guest.seat_id = next(seats)[0]
+                new_guests.append(guest)
+
+        Guest.objects.bulk_update(existing, ['seat', 'version', 'updated_at'], batch_size=500)
+        Guest.objects.bulk_create(new_guests, batch_size=500)
+
+        seat_ids = [seat_id for seats in assignments.values() for seat_id, _ in seats]
+        engaged = Seat.objects.filter(
+            id__in=seat_ids, is_engaged=False
+        ).update(is_engaged=True, version=F('version') + 1, updated_at=now)
+        if engaged != len(seat_ids):
+            raise Conflict('Some seats were taken while the plan was being written.')
+    return len(seat_ids)
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.banket.models import Dish, AdditionalOptions, Hole
+
+PRICE_TABLE_VERSION_KEY = 'price-table-version'
+
+
+class PriceTable:
+    """
+    Dish and option prices and hall capacities kept in process memory, so a
+    quote is computed with dictionary lookups only. Saving a dish, an option
+    or a hall bumps a version counter in the cache; every process compares
+    it with the version it loaded and reloads on mismatch. The table is also
+    reloaded after PRICE_TABLE_TIMEOUT seconds in case the cache is not
+    shared between processes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = 0.0
+        self.dishes = {}
+        self.options = {}
+        self.halls = {}
+
+    def is_stale(self, version):
+        return version != self.version or time.monotonic() - self.loaded_at > settings.PRICE_TABLE_TIMEOUT
+
+    def load(self, version):
+        self.dishes = dict(Dish.objects.values_list('id', 'price'))
+        self.options = dict(AdditionalOptions.objects.values_list('id', 'price'))
+        self.halls = dict(Hole.objects.values_list('id', 'number_of_seats'))
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        version = cache.get_or_set(PRICE_TABLE_VERSION_KEY, time.time_ns, None)
+        if self.is_stale(version):
+            with self.lock:
+                if self.is_stale(version):
+                    self.load(version)
+        return self
+
+    def quote(self, hole, guests, dishes=(), options=()):
+        """
+        Prices one scenario. `dishes` is a list of {'dish': id, 'amount': n};
+        a missing amount means one portion per guest. Ids must be valid.
+        """
+        lines = []
+        for item in dishes:
+            amount = item.get('amount') or guests
+            price = self.dishes[item['dish']]
+            lines.append({'dish': item['dish'], 'amount': amount, 'price': price, 'total': round(price * amount, 2)})
+        dishes_price = round(sum(line['total'] for line in lines), 2)
+        options_price = round(sum(self.options[option] for option in options), 2)
+        total = round(dishes_price + options_price, 2)
+        return {
+            'hole': hole,
+            'guests': guests,
+            'dishes': lines,
+            'options': list(options),
+            'dishes_price': dishes_price,
+            'options_price': options_price,
+            'total': total,
+            'per_guest': round(total / guests, 2),
+        }
+
+
+price_table = PriceTable()
+
+
+def invalidate_price_table():
+    try:
+        cache.incr(PRICE_TABLE_VERSION_KEY)
+    except ValueError:
+        cache.set(PRICE_TABLE_VERSION_KEY, time.time_ns(), None)
+    price_table.version = None
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+@receiver(post_save, sender=AdditionalOptions)
+@receiver(post_delete, sender=AdditionalOptions)
+@receiver(post_save, sender=Hole)
+@receiver(post_delete, sender=Hole)
+def drop_price_table(sender, **kwargs):
+    invalidate_price_table()
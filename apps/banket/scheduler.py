@@ -0,0 +1,66 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.banket.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+jobs = {}
+
+
+def register_job(name, interval):
+    def decorator(func):
+        jobs[name] = {'func': func, 'interval': interval}
+        return func
+    return decorator
+
+
+def run_job(name):
+    job = jobs[name]
+    started_at = timezone.now()
+    start = time.perf_counter()
+    run = JobRun(name=name, started_at=started_at)
+    try:
+        run.rows_affected = job['func']() or 0
+    except Exception:
+        run.succeeded = False
+        run.error = traceback.format_exc()
+        logger.exception('Job %s failed', name)
+    run.duration = time.perf_counter() - start
+    run.save()
+    return run
+
+
+def get_due_jobs(now=None):
+    # Due-ness follows the last attempt, failed or not, so a broken job waits
+    # out its interval instead of being retried on every tick.
+    now = now or timezone.now()
+    last_runs = dict(
+        JobRun.objects.values('name').annotate(last=Max('started_at')).values_list('name', 'last')
+    )
+    return [
+        name for name, job in jobs.items()
+        if name not in last_runs or last_runs[name] + timedelta(seconds=job['interval']) <= now
+    ]
+
+
+def run_due_jobs():
+    return [run_job(name) for name in get_due_jobs()]
+
+
+def purge_old_runs():
+    """
+    Deletes job runs older than JOB_RUN_RETENTION_DAYS. The latest run of
+    each job is kept whatever its age, since due-ness is computed from it.
+    """
+    latest = JobRun.objects.filter(name=OuterRef('name')).order_by('-started_at').values('started_at')[:1]
+    deleted, _ = JobRun.objects.filter(
+        started_at__lt=timezone.now() - timedelta(days=settings.JOB_RUN_RETENTION_DAYS),
+    ).exclude(started_at=Subquery(latest)).delete()
+    return deleted
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+
+from apps.banket.exceptions import Conflict
+from apps.banket.models import Seat, Guest
+
+
+def engage_seat(event_id, number):
+    seat = Seat.objects.filter(event_id=event_id, number=number).values('id', 'version', 'is_engaged').first()
+    if seat is None:
+        raise NotFound(f'Seat {number} does not exist in this event.')
+    if seat['is_engaged']:
+        raise Conflict(f'Seat {number} is already taken.')
+
+    updated = Seat.objects.filter(
+        pk=seat['id'], version=seat['version'], is_engaged=False
+    ).update(is_engaged=True, version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        raise Conflict(f'Seat {number} was taken by another request.')
+    return seat['id']
+
+
+def free_seat(seat_id):
+    Seat.objects.filter(pk=seat_id).update(is_engaged=False, version=F('version') + 1, updated_at=timezone.now())
+
+
+def change_seat(guest, event_id, number, version=None):
+    """
+    Moves a guest to another seat of the event in one transaction: the new
+    seat is engaged, the guest is reassigned and the old seat is freed, each
+    with a conditional UPDATE. Raises Conflict (409) when the seat or the
+    guest was changed concurrently.
+    """
+    if version is None:
+        version = guest.version
+
+    if guest.seat_id and guest.seat.number == number:
+        raise Conflict(f'The guest already sits on seat {number}.')
+
+    with transaction.atomic():
+        seat_id = engage_seat(event_id, number)
+
+        updated = Guest.objects.filter(
+            pk=guest.pk, version=version, seat_id=guest.seat_id
+        ).update(seat_id=seat_id, version=F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            raise Conflict('The guest was changed by another request.')
+
+        if guest.seat_id:
+            free_seat(guest.seat_id)
+
+    guest.refresh_from_db(fields=['seat', 'version'])
+    return guest
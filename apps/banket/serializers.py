@@ -1,8 +1,24 @@
 from django.db.models import Sum, F
 from rest_framework import serializers
 
-from apps.banket.models import Event, Dish, Comment, OrderedDish, Hole, Image, Guest, Seat, AdditionalOptions
-from apps.users.serializers import UserSerializer
+from apps.banket.models import Event, Dish, Comment, OrderedDish, Hole, Image, Guest, Seat, AdditionalOptions, \
+    ArchivedSeat, ArchivedGuest, ArchivedOrderedDish
+from apps.banket.planner import DEFAULT_TABLE_SIZE
+from apps.banket.pricing import price_table
+from apps.users.serializers import UserListSerializer, UserSerializer
+
+
+DEFAULT_HOLE_ID = 1
+MAX_AVAILABILITY_DAYS = 366
+MAX_QUOTE_SCENARIOS = 100
+
+
+class OwnedEventField(serializers.PrimaryKeyRelatedField):
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return Event.objects.none()
+        return Event.objects.filter(user=request.user)
 
 
 class AdditionalOptionsSerializer(serializers.ModelSerializer):
@@ -20,8 +36,30 @@ class EventSerializer(serializers.ModelSerializer):
             'description',
             'event_type',
             'date_planned',
-            'is_passed'
+            'is_passed',
+            'is_archived',
         )
+        read_only_fields = (
+            'is_archived',
+        )
+
+    def validate(self, attrs):
+        if self.instance is None and attrs.get('hole') is None:
+            attrs.pop('hole', None)
+            attrs['hole_id'] = hole_id = DEFAULT_HOLE_ID
+        elif 'hole' in attrs:
+            hole_id = attrs['hole'].pk if attrs['hole'] else None
+        else:
+            hole_id = self.instance.hole_id
+        date_planned = attrs.get('date_planned', getattr(self.instance, 'date_planned', None))
+
+        if hole_id and date_planned:
+            booked = Event.objects.filter(hole_id=hole_id, date_planned=date_planned)
+            if self.instance is not None:
+                booked = booked.exclude(pk=self.instance.pk)
+            if booked.exists():
+                raise serializers.ValidationError({'date_planned': 'The hall is already booked for this date.'})
+        return attrs
 
 
 class EventListSerializer(serializers.ModelSerializer):
@@ -37,13 +75,20 @@ class EventListSerializer(serializers.ModelSerializer):
             'date_planned',
             'total_price',
             'is_passed',
+            'is_archived',
         )
 
     def get_guest_count(self, obj):
-        return Guest.objects.filter(event=obj).count()
+        if hasattr(obj, 'total_guests'):
+            return obj.total_guests
+        guests = ArchivedGuest if obj.is_archived else Guest
+        return guests.objects.filter(event=obj).count()
 
     def get_total_price(self, obj):
-        dishes_price = OrderedDish.objects.filter(
+        if hasattr(obj, 'total_dishes_price'):
+            return obj.total_dishes_price + obj.total_options_price
+        ordered_dishes = ArchivedOrderedDish if obj.is_archived else OrderedDish
+        dishes_price = ordered_dishes.objects.filter(
             event=obj
         ).aggregate(
             total=Sum(F('amount') * F('dish__price'))
@@ -70,6 +115,7 @@ class EventDetailSerializer(serializers.ModelSerializer):
             'date_created',
             'date_planned',
             'is_passed',
+            'is_archived',
         )
         extra_kwargs = {
             'user': {'read_only': True},
@@ -95,19 +141,21 @@ class AdditionalOptionsChangeSerializer(serializers.ModelSerializer):
 class DishSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dish
-        fields = '__all__'
+        exclude = ('search_vector',)
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = UserListSerializer(read_only=True)
 
     class Meta:
         model = Comment
         fields = (
             'id',
             'user',
-            'text'
+            'text',
+            'created_at',
         )
+        read_only_fields = ('created_at',)
 
     extra_kwargs = {
         'user': {'read_only': True}
@@ -116,7 +164,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
 class OrderedDishSerializer(serializers.ModelSerializer):
     dish = serializers.PrimaryKeyRelatedField(queryset=Dish.objects.all(), many=False)
-    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all(), many=False)
+    event = OwnedEventField(many=False)
 
     class Meta:
         model = OrderedDish
@@ -164,7 +212,7 @@ class HoleSerializer(serializers.ModelSerializer):
 
 
 class GuestSerializer(serializers.ModelSerializer):
-    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all(), write_only=True)
+    event = OwnedEventField(write_only=True)
     seat = serializers.CharField(required=True)
     user = UserSerializer(read_only=True)
 
@@ -178,11 +226,13 @@ class GuestSerializer(serializers.ModelSerializer):
             'seat',
             'event',
             'user',
+            'version',
         )
 
         extra_kwargs = {
             'user': {'read_only': True},
             'event': {'write_only': True},
+            'version': {'read_only': True},
         }
 
 
@@ -194,21 +244,197 @@ class SeatSerializer(serializers.ModelSerializer):
             'number',
             'description',
             'is_engaged',
+            'version',
+            'table',
+            'position',
+        )
+
+
+class FreeSeatsFilterSerializer(serializers.Serializer):
+    table = serializers.IntegerField(required=False)
+    zone = serializers.IntegerField(required=False)
+
+
+class GuestBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    event = OwnedEventField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('event'):
+            raise serializers.ValidationError('Pass guest ids, an event, or both.')
+        return attrs
+
+
+class ArchivedSeatSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='original_id')
+
+    class Meta:
+        model = ArchivedSeat
+        fields = (
+            'id',
+            'number',
+            'description',
+            'is_engaged',
+            'version',
+            'table',
+            'position',
+        )
+
+
+class ArchivedGuestSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='original_id')
+    seat = serializers.CharField(source='seat_number')
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedGuest
+        fields = (
+            'id',
+            'first_name',
+            'last_name',
+            'email',
+            'seat',
+            'user',
+            'version',
+        )
+
+
+class ArchivedOrderedDishSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='original_id')
+    dish = DishSerializer()
+
+    class Meta:
+        model = ArchivedOrderedDish
+        fields = (
+            'id',
+            'dish',
+            'amount',
         )
 
 
 class SeatChangeSerializer(serializers.ModelSerializer):
     seat_number = serializers.CharField(required=True)
     event_id = serializers.CharField(required=True)
+    version = serializers.IntegerField(required=False, min_value=0)
 
     class Meta:
         model = Guest
         fields = (
             'seat_number',
-            'event_id'
+            'event_id',
+            'version',
         )
 
 
 class InvitationSerializer(serializers.Serializer):
     man_fullname = serializers.CharField(max_length=255, required=True)
     women_fullname = serializers.CharField(max_length=255, required=True)
+
+
+class EventCloneSerializer(serializers.Serializer):
+    date_planned = serializers.DateField(required=True)
+    hole = serializers.PrimaryKeyRelatedField(queryset=Hole.objects.all(), required=False)
+    description = serializers.CharField(required=False)
+    include_guests = serializers.BooleanField(default=False)
+
+
+class SyncSerializer(serializers.Serializer):
+    cursor = serializers.DateTimeField(required=False)
+
+
+class AvailabilitySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=True)
+    date_to = serializers.DateField(required=True)
+
+    def validate(self, attrs):
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_to': 'date_to must not be earlier than date_from.'})
+        if (attrs['date_to'] - attrs['date_from']).days >= MAX_AVAILABILITY_DAYS:
+            raise serializers.ValidationError({'date_to': f'The range cannot exceed {MAX_AVAILABILITY_DAYS} days.'})
+        return attrs
+
+
+class SeatingGuestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Guest
+        fields = (
+            'first_name',
+            'last_name',
+            'email',
+        )
+
+
+class SeatingGroupSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    guest_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    guests = SeatingGuestSerializer(many=True, required=False)
+    keep_together = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        attrs.setdefault('guests', [])
+        if not attrs['guest_ids'] and not attrs['guests']:
+            raise serializers.ValidationError('A group needs guest_ids or guests.')
+        return attrs
+
+
+class SeatingPlanSerializer(serializers.Serializer):
+    groups = SeatingGroupSerializer(many=True, allow_empty=False)
+    apart = serializers.ListField(
+        child=serializers.ListField(child=serializers.CharField(), min_length=2, max_length=2),
+        required=False,
+        default=list,
+    )
+    table_size = serializers.IntegerField(min_value=1, default=DEFAULT_TABLE_SIZE)
+
+    def validate(self, attrs):
+        names = [group['name'] for group in attrs['groups']]
+        if len(names) != len(set(names)):
+            raise serializers.ValidationError({'groups': 'Group names must be unique.'})
+        unknown = {name for pair in attrs['apart'] for name in pair} - set(names)
+        if unknown:
+            raise serializers.ValidationError({'apart': f'Unknown groups: {", ".join(sorted(unknown))}.'})
+        guest_ids = [guest_id for group in attrs['groups'] for guest_id in group['guest_ids']]
+        if len(guest_ids) != len(set(guest_ids)):
+            raise serializers.ValidationError({'groups': 'A guest can belong to one group only.'})
+        return attrs
+
+
+class QuoteDishSerializer(serializers.Serializer):
+    dish = serializers.IntegerField()
+    amount = serializers.IntegerField(min_value=1, required=False)
+
+
+class QuoteScenarioSerializer(serializers.Serializer):
+    hole = serializers.IntegerField()
+    guests = serializers.IntegerField(min_value=1)
+    dishes = QuoteDishSerializer(many=True, required=False)
+    options = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        attrs.setdefault('dishes', [])
+        return attrs
+
+
+class QuoteSerializer(serializers.Serializer):
+    scenarios = QuoteScenarioSerializer(many=True, allow_empty=False, max_length=MAX_QUOTE_SCENARIOS)
+
+    def validate(self, attrs):
+        prices = price_table.refresh()
+        errors = {}
+        for index, scenario in enumerate(attrs['scenarios']):
+            problems = []
+            if scenario['hole'] not in prices.halls:
+                problems.append(f'Unknown hole {scenario["hole"]}.')
+            elif scenario['guests'] > prices.halls[scenario['hole']]:
+                problems.append(f'The hole seats at most {prices.halls[scenario["hole"]]} guests.')
+            problems += [
+                f'Unknown dish {item["dish"]}.' for item in scenario['dishes'] if item['dish'] not in prices.dishes
+            ]
+            problems += [
+                f'Unknown option {option}.' for option in scenario['options'] if option not in prices.options
+            ]
+            if problems:
+                errors[index] = problems
+        if errors:
+            raise serializers.ValidationError({'scenarios': errors})
+        return attrs
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.banket.models import Event, Seat, Guest, OrderedDish, Tombstone
+
+EVENT_FIELDS = ('id', 'hole_id', 'description', 'event_type', 'date_planned', 'is_passed', 'is_archived', 'updated_at')
+SEAT_FIELDS = ('id', 'number', 'description', 'is_engaged', 'version', 'table_id', 'position_id')
+GUEST_FIELDS = ('id', 'first_name', 'last_name', 'email', 'seat_id', 'version')
+ORDERED_DISH_FIELDS = ('id', 'user_id', 'dish_id', 'amount')
+
+
+def get_retention_start():
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def get_changes(event, since=None):
+    """
+    Returns the rows of an event changed after the `since` cursor, plus the
+    ids of guests and ordered dishes deleted since then. `event` is a dict of
+    EVENT_FIELDS. Without a cursor, or with one older than the tombstone
+    retention, everything is returned with `reset` set and the client must
+    replace its copy.
+
+    The returned cursor lags the current time by SYNC_CURSOR_OVERLAP seconds,
+    so rows written by transactions that commit while this one reads are
+    sent again next time instead of being missed. Clients apply changes as
+    upserts, so repeats are harmless.
+    """
+    cursor = timezone.now() - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP)
+    reset = since is None or since < get_retention_start()
+    changed = {} if reset else {'updated_at__gt': since}
+
+    data = {
+        'cursor': cursor,
+        'reset': reset,
+        'event': None,
+        'seats': list(Seat.objects.filter(event_id=event['id'], **changed).values(*SEAT_FIELDS)),
+        'guests': list(Guest.objects.filter(event_id=event['id'], **changed).values(*GUEST_FIELDS)),
+        'ordered_dishes': list(
+            OrderedDish.objects.filter(event_id=event['id'], **changed).values(*ORDERED_DISH_FIELDS)
+        ),
+        'deleted': {model: [] for model, _ in Tombstone.MODELS},
+    }
+    if reset or event['updated_at'] > since:
+        options = Event.add_options.through.objects.filter(event_id=event['id'])
+        data['event'] = {**event, 'add_options': list(options.values_list('additionaloptions_id', flat=True))}
+    if not reset:
+        deleted = Tombstone.objects.filter(event_id=event['id'], deleted_at__gt=since).values_list('model', 'object_id')
+        for model, object_id in deleted:
+            data['deleted'][model].append(object_id)
+    return data
+
+
+def purge_expired_tombstones():
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=get_retention_start()).delete()
+    return deleted
@@ -1,3 +1,1287 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, migrations, models
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.banket import planner, seats
+from apps.banket.archive import archive_event_ids
+from apps.banket.coalescing import SingleFlight
+from apps.banket.factories import create_user, create_hall, create_menu, create_event, create_comments, \
+    get_auth_header, create_layout_hall
+from apps.banket.jobs import mark_passed_events
+from apps.banket.layout import LayoutError, build_layout
+from apps.banket.models import Seat, Guest, Zone, Table, Comment, IdempotencyKey, OrderedDish, Tombstone, Event, Dish, \
+    JobRun, ArchivedSeat, ArchivedGuest, ArchivedOrderedDish, SeatPosition
+from apps.banket.operations import PostgresOnly
+from apps.banket.scheduler import get_due_jobs, purge_old_runs, register_job, run_job
+from apps.banket.serializers import EventSerializer
+
+
+class QueryBudgetTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.hall = create_hall(seats=300)
+        cls.menu, cls.options = create_menu(dishes=20, options=5)
+        cls.event = create_event(cls.user, cls.hall, guests=250, dishes=cls.menu, options=cls.options)
+        for _ in range(5):
+            create_event(cls.user, cls.hall, guests=50, dishes=cls.menu[:5])
+        create_comments(cls.user, amount=50)
+
+        cls.other_user = create_user()
+        create_event(cls.other_user, cls.hall, guests=100, dishes=cls.menu)
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(**get_auth_header(self.user))
+        self.client.get(reverse('get_profile'))
+
+    def assertBudget(self, budget, method, url, status_code=200, **kwargs):
+        with self.assertNumQueries(budget):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertEqual(response.status_code, status_code, response.content)
+        return response
+
+
+class EventQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        response = self.assertBudget(2, 'get', reverse('events-list'))
+        self.assertEqual(response.data['count'], 6)
+
+    def test_detail(self):
+        self.assertBudget(3, 'get', reverse('events-detail', args=[self.event.id]))
+
+    def test_detail_of_foreign_event(self):
+        other_event = create_event(self.other_user, create_hall(seats=10), guests=1)
+        self.assertBudget(1, 'get', reverse('events-detail', args=[other_event.id]), status_code=404)
+
+    def test_my_events_does_not_grow_with_event_count(self):
+        response = self.assertBudget(1, 'get', reverse('events-my-events'))
+        self.assertEqual(len(response.data), 6)
+        first = next(row for row in response.data if row['id'] == self.event.id)
+        self.assertEqual(first['guest_count'], 250)
+
+        for _ in range(5):
+            create_event(self.user, self.hall, guests=10, dishes=self.menu[:2])
+        self.assertBudget(1, 'get', reverse('events-my-events'))
+
+    def test_event_seats(self):
+        response = self.assertBudget(1, 'get', reverse('events-event-seats', args=[self.event.id]))
+        self.assertEqual(len(response.data), 300)
+
+    def test_event_guests(self):
+        response = self.assertBudget(1, 'get', reverse('events-event-guests', args=[self.event.id]))
+        self.assertEqual(len(response.data), 250)
+
+    def test_total_price(self):
+        response = self.assertBudget(3, 'get', reverse('events-total-price', args=[self.event.id]))
+        expected = sum(dish.price for dish in self.menu) * 250 + sum(option.price for option in self.options)
+        self.assertAlmostEqual(response.data['price'], expected)
+
+    def test_all_options(self):
+        self.assertBudget(1, 'get', reverse('events-all-options'))
+
+    def test_my_ordered_dishes(self):
+        response = self.assertBudget(1, 'get', reverse('events-my-ordered-dishes', args=[self.event.id]))
+        self.assertEqual(len(response.data), 20)
+
+    def test_create(self):
+        hall = create_hall(seats=120)
+        response = self.assertBudget(7, 'post', reverse('events-list'), status_code=201, data={
+            'hole': hall.id,
+            'date_planned': '2040-01-01',
+        })
+        self.assertEqual(Seat.objects.filter(event_id=response.data['id']).count(), 120)
+
+
+class DishQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        response = self.assertBudget(1, 'get', reverse('dishes-list'))
+        self.assertEqual(len(response.data), 20)
+
+
+@override_settings(FEED_POLL_OVERLAP=0)
+class CommentQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        response = self.assertBudget(1, 'get', reverse('comments-list'))
+        self.assertEqual(response.data['results'][0]['user']['email'], self.user.email)
+
+    def test_feed_is_newest_first(self):
+        expected = list(Comment.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True))
+        seen = []
+        url = reverse('comments-list') + '?page_size=7'
+        while url:
+            response = self.assertBudget(1, 'get', url)
+            seen.extend(comment['id'] for comment in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+    def test_poll_since(self):
+        since = self.client.get(reverse('comments-list')).data['since']
+        new = create_comments(self.user, amount=3)
+        response = self.assertBudget(1, 'get', reverse('comments-list'), data={'since': since})
+        self.assertEqual([comment['id'] for comment in response.data['results']], [comment.id for comment in new])
+
+        response = self.assertBudget(1, 'get', reverse('comments-list'), data={'since': response.data['since']})
+        self.assertEqual(response.data['results'], [])
+
+    def test_poll_pages_through_a_backlog(self):
+        since = self.client.get(reverse('comments-list')).data['since']
+        new = create_comments(self.user, amount=5)
+        response = self.client.get(reverse('comments-list'), {'since': since, 'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get(reverse('comments-list'), {'since': response.data['since'], 'page_size': 3})
+        self.assertEqual([comment['id'] for comment in response.data['results']], [comment.id for comment in new[3:]])
+
+    def test_invalid_since(self):
+        self.assertBudget(0, 'get', reverse('comments-list'), status_code=404, data={'since': 'garbage'})
+
+    @override_settings(FEED_POLL_OVERLAP=60)
+    def test_poll_resends_the_overlap_window(self):
+        Comment.objects.update(created_at=timezone.now() - timedelta(minutes=10))
+        newest = create_comments(self.user, amount=1)[0]
+        since = self.client.get(reverse('comments-list')).data['since']
+
+        # Committed after `newest` was served, but stamped before it.
+        late = create_comments(self.user, amount=1)[0]
+        Comment.objects.filter(pk=late.pk).update(created_at=newest.created_at - timedelta(seconds=1))
+        response = self.client.get(reverse('comments-list'), {'since': since})
+        self.assertEqual({comment['id'] for comment in response.data['results']}, {newest.id, late.id})
+
+        response = self.client.get(reverse('comments-list'), {'since': response.data['since']})
+        self.assertEqual({comment['id'] for comment in response.data['results']}, {newest.id, late.id})
+
+
+class GuestQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        self.assertBudget(2, 'get', reverse('guest-list'))
+
+
+class HoleQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        self.assertBudget(3, 'get', reverse('hole-list'))
+
+    def test_availability(self):
+        self.assertBudget(2, 'get', reverse('hole-availability'))
+
+
+class OwnershipTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        menu, _ = create_menu(dishes=2, options=0)
+        self.dish = menu[0]
+        self.user, self.other_user = create_user(), create_user()
+        self.event = create_event(self.user, create_hall(seats=10), guests=2, dishes=menu[:1])
+        self.other_event = create_event(self.other_user, create_hall(seats=10), guests=3, dishes=menu)
+        create_comments(self.user, amount=2)
+        create_comments(self.other_user, amount=3)
+        self.client.credentials(**get_auth_header(self.user))
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return {row['id'] for row in rows}
+
+    def test_lists_return_only_own_rows(self):
+        self.assertEqual(self.ids(reverse('events-list')), {self.event.id})
+        self.assertEqual(self.ids(reverse('events-my-events')), {self.event.id})
+        self.assertEqual(
+            self.ids(reverse('guest-list')), set(Guest.objects.filter(user=self.user).values_list('id', flat=True))
+        )
+        self.assertEqual(
+            self.ids(reverse('comments-list')), set(Comment.objects.filter(user=self.user).values_list('id', flat=True))
+        )
+        self.assertEqual(
+            self.ids(reverse('events-my-ordered-dishes', args=[self.event.id])),
+            set(OrderedDish.objects.filter(user=self.user).values_list('id', flat=True)),
+        )
+        self.assertEqual(self.ids(reverse('events-event-guests', args=[self.other_event.id])), set())
+        self.assertEqual(self.ids(reverse('events-my-ordered-dishes', args=[self.other_event.id])), set())
+
+    def test_foreign_rows_are_not_found(self):
+        order = OrderedDish.objects.filter(event=self.other_event).first()
+        guest = Guest.objects.filter(event=self.other_event).first()
+        self.assertEqual(self.client.get(reverse('events-detail', args=[self.other_event.id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('ordered-dishes-detail', args=[order.id])).status_code, 404)
+        self.assertEqual(self.client.delete(reverse('ordered-dishes-detail', args=[order.id])).status_code, 404)
+        self.assertEqual(self.client.delete(reverse('guest-detail', args=[guest.id])).status_code, 404)
+        self.assertTrue(OrderedDish.objects.filter(pk=order.pk).exists())
+        self.assertTrue(Guest.objects.filter(pk=guest.pk).exists())
+
+    def test_guest_create_rejects_a_foreign_event(self):
+        response = self.client.post(reverse('guest-list'), {
+            'first_name': 'Gate', 'last_name': 'Crasher', 'seat': '10', 'event': self.other_event.id,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('event', response.data)
+        self.assertFalse(Guest.objects.filter(first_name='Gate').exists())
+        self.assertFalse(Seat.objects.filter(event=self.other_event, number='10', is_engaged=True).exists())
+
+    def test_order_create_rejects_a_foreign_event(self):
+        response = self.client.post(reverse('ordered-dishes-list'), {
+            'dish': self.dish.id, 'amount': 5, 'event': self.other_event.id,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('event', response.data)
+        self.assertEqual(OrderedDish.objects.filter(event=self.other_event).count(), 2)
+
+    def test_own_event_is_accepted(self):
+        response = self.client.post(reverse('ordered-dishes-list'), {
+            'dish': self.dish.id, 'amount': 5, 'event': self.event.id,
+        })
+        self.assertEqual(response.status_code, 201)
+
+
+class EventBookingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.hall = create_hall(seats=10)
+        self.client.credentials(**get_auth_header(self.user))
+
+    def create(self, **data):
+        return self.client.post(reverse('events-list'), {'hole': self.hall.id, 'date_planned': '2040-01-01', **data})
+
+    def test_requested_hall_is_saved(self):
+        response = self.create()
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Event.objects.get(pk=response.data['id']).hole_id, self.hall.id)
+
+    def test_booked_hall_and_date_is_rejected(self):
+        self.create()
+        response = self.create()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_planned', response.data)
+        self.assertEqual(Event.objects.filter(hole=self.hall).count(), 1)
+
+    def test_same_date_in_another_hall_is_allowed(self):
+        self.create()
+        self.assertEqual(self.create(hole=create_hall(seats=10).id).status_code, 201)
+
+    def test_moving_onto_a_booked_date_is_rejected(self):
+        self.create()
+        event_id = self.create(date_planned='2040-01-02').data['id']
+        response = self.client.patch(reverse('events-detail', args=[event_id]), {'date_planned': '2040-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_concurrent_booking_that_passes_validation_is_rejected(self):
+        self.create()
+        event_id = self.create(date_planned='2040-01-02').data['id']
+        with mock.patch.object(EventSerializer, 'validate', lambda serializer, attrs: attrs):
+            self.assertEqual(self.create().status_code, 400)
+            response = self.client.patch(reverse('events-detail', args=[event_id]), {'date_planned': '2040-01-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(str(Event.objects.get(pk=event_id).date_planned), '2040-01-02')
+
+
+class DuplicateBookingMigrationTests(TransactionTestCase):
+    migrate_from = [('banket', '0008_search_vectors')]
+    migrate_to = [('banket', '0009_event_unique_hole_date')]
+
+    def tearDown(self):
+        call_command('migrate', verbosity=0)
+
+    def test_duplicate_bookings_are_released_before_the_constraint(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        user = apps.get_model('auth', 'User').objects.create(username='old')
+        hall = apps.get_model('banket', 'Hole').objects.create(name='Hall', number_of_seats=0)
+        Event = apps.get_model('banket', 'Event')
+        events = [Event.objects.create(user_id=user.id, hole_id=hall.id, date_planned='2030-01-01') for _ in range(3)]
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        with redirect_stdout(StringIO()) as output:
+            executor.migrate(self.migrate_to)
+
+        Event = executor.loader.project_state(self.migrate_to).apps.get_model('banket', 'Event')
+        self.assertEqual(
+            list(Event.objects.order_by('id').values_list('hole_id', flat=True)), [hall.id, None, None]
+        )
+        self.assertIn(f'kept event {events[0].id}', output.getvalue())
+
+
+class SearchTests(APITestCase):
+    """?search= on SQLite, where FullTextSearchFilter falls back to icontains lookups."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.credentials(**get_auth_header(self.user))
+
+    def search(self, url_name, term):
+        response = self.client.get(reverse(url_name), {'search': term})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results'] if isinstance(response.data, dict) else response.data
+
+    def test_events(self):
+        hall = create_hall(seats=10)
+        wedding = create_event(self.user, hall, guests=0, event_type='WEDDING', description='Summer party')
+        birthday = create_event(self.user, hall, guests=0, event_type='BIRTHDAY', description='Garden wedding cake')
+        create_event(self.user, hall, guests=0, event_type='OTHER', description='Company dinner')
+        create_event(create_user(), hall, guests=0, event_type='WEDDING', description='Not mine')
+        self.assertEqual({event['id'] for event in self.search('events-list', 'wedding')}, {wedding.id, birthday.id})
+        self.assertEqual([event['id'] for event in self.search('events-list', 'summer')], [wedding.id])
+
+    def test_dishes(self):
+        menu, _ = create_menu(dishes=3, options=0)
+        Dish.objects.filter(pk=menu[1].pk).update(name='Chicken soup')
+        self.assertEqual([dish['id'] for dish in self.search('dishes-list', 'chicken')], [menu[1].id])
+        self.assertEqual(len(self.search('dishes-list', 'dish number')), 3)
+
+    def test_comments(self):
+        comments = create_comments(self.user, amount=3)
+        Comment.objects.filter(pk=comments[0].pk).update(text='The band was great')
+        create_comments(create_user(), amount=1)
+        self.assertEqual([comment['id'] for comment in self.search('comments-list', 'band')], [comments[0].id])
+        self.assertEqual(len(self.search('comments-list', 'comment')), 2)
+
+
+class PostgresOnlyTests(TransactionTestCase):
+    def test_skips_the_database_but_keeps_the_state_elsewhere(self):
+        self.assertNotEqual(connection.vendor, 'postgresql')
+        operation = PostgresOnly(migrations.AddIndex(
+            model_name='dish', index=models.Index(fields=['name'], name='banket_dish_test_idx'),
+        ))
+        from_state = MigrationExecutor(connection).loader.project_state()
+        to_state = from_state.clone()
+        operation.state_forwards('banket', to_state)
+        self.assertEqual(
+            [index.name for index in to_state.models['banket', 'dish'].options['indexes']][-1], 'banket_dish_test_idx'
+        )
+
+        with connection.schema_editor() as editor:
+            operation.database_forwards('banket', editor, from_state, to_state)
+            PostgresOnly(migrations.RunSQL('THIS IS NOT SQL')).database_forwards('banket', editor, from_state, to_state)
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Dish._meta.db_table)
+        self.assertNotIn('banket_dish_test_idx', indexes)
+
+
+class GuestSeatTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.event = create_event(self.user, create_hall(seats=10), guests=2)
+        self.guest = Guest.objects.filter(event=self.event).select_related('seat').first()
+        self.client.credentials(**get_auth_header(self.user))
+
+    def change_seat(self, number, **extra):
+        return self.client.post(reverse('guest-change-seat', args=[self.guest.id]), {
+            'seat_number': number,
+            'event_id': self.event.id,
+            **extra,
+        })
+
+    def test_create_engages_the_seat(self):
+        response = self.client.post(reverse('guest-list'), {
+            'first_name': 'New', 'last_name': 'Guest', 'seat': '5', 'event': self.event.id,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Seat.objects.get(event=self.event, number='5').is_engaged)
+
+    def test_create_on_a_taken_seat_conflicts(self):
+        response = self.client.post(reverse('guest-list'), {
+            'first_name': 'New', 'last_name': 'Guest', 'seat': self.guest.seat.number, 'event': self.event.id,
+        })
+        self.assertEqual(response.status_code, 409)
+
+    def test_change_seat_frees_the_old_seat(self):
+        old_seat = self.guest.seat
+        response = self.change_seat('7', version=self.guest.version)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['version'], self.guest.version + 1)
+        old_seat.refresh_from_db()
+        self.assertFalse(old_seat.is_engaged)
+        self.assertTrue(Seat.objects.get(event=self.event, number='7').is_engaged)
+        self.assertEqual(Guest.objects.get(pk=self.guest.pk).seat.number, '7')
+
+    def test_change_seat_with_stale_version_conflicts(self):
+        response = self.change_seat('7', version=self.guest.version + 5)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Seat.objects.get(event=self.event, number='7').is_engaged)
+
+    def test_change_to_taken_seat_conflicts(self):
+        other = Guest.objects.filter(event=self.event).exclude(pk=self.guest.pk).select_related('seat').first()
+        response = self.change_seat(other.seat.number)
+        self.assertEqual(response.status_code, 409)
+
+
+    def test_change_to_own_seat_conflicts(self):
+        response = self.change_seat(self.guest.seat.number)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('already sits', response.data['detail'])
+        self.assertTrue(Seat.objects.get(pk=self.guest.seat_id).is_engaged)
+
+    def test_change_to_a_seat_of_another_event_is_rejected(self):
+        other_event = create_event(self.user, create_hall(seats=10), guests=0)
+        response = self.change_seat('7', event_id=other_event.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('event_id', response.data)
+        self.assertFalse(Seat.objects.filter(event=other_event, is_engaged=True).exists())
+        self.assertEqual(Guest.objects.get(pk=self.guest.pk).seat_id, self.guest.seat_id)
+
+
+class GuestDeletionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.event = create_event(self.user, create_hall(seats=300), guests=250)
+        self.client.credentials(**get_auth_header(self.user))
+        self.client.get(reverse('get_profile'))
+
+    def test_bulk_delete_frees_seats_in_constant_queries(self):
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse('guest-bulk-delete'), {'event': self.event.id})
+        self.assertEqual(response.data['deleted'], 250)
+        self.assertFalse(Seat.objects.filter(event=self.event, is_engaged=True).exists())
+
+    def test_bulk_delete_by_ids(self):
+        ids = list(Guest.objects.filter(event=self.event).values_list('id', flat=True)[:10])
+        response = self.client.post(reverse('guest-bulk-delete'), {'ids': ids}, format='json')
+        self.assertEqual(response.data['deleted'], 10)
+        self.assertEqual(Seat.objects.filter(event=self.event, is_engaged=True).count(), 240)
+
+    def test_destroy_frees_the_seat(self):
+        guest = Guest.objects.filter(event=self.event).first()
+        response = self.client.delete(reverse('guest-detail', args=[guest.id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Seat.objects.get(pk=guest.seat_id).is_engaged)
+
+    def test_queryset_delete_handles_guests_without_seat(self):
+        Guest.objects.create(user=self.user, event=self.event, first_name='No', last_name='Seat')
+        deleted, _ = Guest.objects.filter(event=self.event).delete()
+        self.assertEqual(deleted, 251)
+
+    def test_event_deletion_cascades_without_per_guest_queries(self):
+        with self.assertNumQueries(13):
+            self.event.delete()
+        self.assertFalse(Guest.objects.exists())
+
+
+class SeatingPlanTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.event = create_event(self.user, create_hall(seats=40), guests=0)
+        self.client.credentials(**get_auth_header(self.user))
+
+    def plan(self, groups, **extra):
+        return self.client.post(reverse('events-plan-seating', args=[self.event.id]), {
+            'groups': groups, **extra,
+        }, format='json')
+
+    def new_guests(self, amount, family='Family'):
+        return [{'first_name': f'Guest{i}', 'last_name': family} for i in range(amount)]
+
+    def table_of(self, number):
+        return (int(number) - 1) // 10
+
+    def test_keeps_groups_at_one_table(self):
+        response = self.plan([
+            {'name': 'Smiths', 'guests': self.new_guests(6)},
+            {'name': 'Joneses', 'guests': self.new_guests(4)},
+            {'name': 'Browns', 'guests': self.new_guests(7)},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['seated'], 17)
+        for numbers in response.data['groups'].values():
+            self.assertEqual(len({self.table_of(number) for number in numbers}), 1)
+        self.assertEqual(Seat.objects.filter(event=self.event, is_engaged=True).count(), 17)
+        self.assertEqual(Guest.objects.filter(event=self.event, seat__isnull=False).count(), 17)
+
+    def test_keeps_groups_apart(self):
+        response = self.plan([
+            {'name': 'Montagues', 'guests': self.new_guests(3)},
+            {'name': 'Capulets', 'guests': self.new_guests(3)},
+        ], apart=[['Montagues', 'Capulets']])
+        self.assertEqual(response.status_code, 200, response.content)
+        tables = {name: self.table_of(numbers[0]) for name, numbers in response.data['groups'].items()}
+        self.assertNotEqual(tables['Montagues'], tables['Capulets'])
+
+    def test_splits_large_groups_that_may_be_split(self):
+        response = self.plan([{'name': 'Office', 'guests': self.new_guests(25), 'keep_together': False}])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['groups']['Office']), 25)
+
+    def test_moves_existing_guests_and_frees_their_seats(self):
+        guest = Guest.objects.create(user=self.user, event=self.event, first_name='Old', last_name='Guest')
+        seats.engage_seat(self.event.id, '40')
+        Guest.objects.filter(pk=guest.pk).update(seat=Seat.objects.get(event=self.event, number='40'))
+        response = self.plan([{'name': 'Family', 'guest_ids': [guest.id], 'guests': self.new_guests(2)}])
+        self.assertEqual(response.status_code, 200, response.content)
+        guest.refresh_from_db()
+        self.assertIn(guest.seat.number, response.data['groups']['Family'])
+        self.assertFalse(Seat.objects.get(event=self.event, number='40').is_engaged)
+
+    def test_guest_changed_after_planning_conflicts(self):
+        guest = Guest.objects.create(user=self.user, event=self.event, first_name='Old', last_name='Guest')
+        plan_seating = planner.plan_seating
+
+        def plan_while_the_guest_moves(*args):
+            assignments = plan_seating(*args)
+            seats.change_seat(Guest.objects.get(pk=guest.pk), self.event.id, '40')
+            return assignments
+
+        with mock.patch.object(planner, 'plan_seating', plan_while_the_guest_moves):
+            response = self.plan([{'name': 'Family', 'guest_ids': [guest.id], 'guests': self.new_guests(2)}])
+        self.assertEqual(response.status_code, 409)
+        guest.refresh_from_db()
+        self.assertEqual(guest.seat.number, '40')
+        self.assertEqual(guest.version, 1)
+        self.assertEqual(Guest.objects.filter(event=self.event).count(), 1)
+        self.assertEqual(list(Seat.objects.filter(event=self.event, is_engaged=True).values_list('number', flat=True)),
+                         ['40'])
+
+    def test_rejects_plans_that_do_not_fit(self):
+        response = self.plan([{'name': 'Crowd', 'guests': self.new_guests(41), 'keep_together': False}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Guest.objects.filter(event=self.event).exists())
+
+    def test_rejects_foreign_guests(self):
+        other = create_event(create_user(), create_hall(seats=10), guests=1)
+        guest = Guest.objects.get(event=other)
+        response = self.plan([{'name': 'Strangers', 'guest_ids': [guest.id]}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_seats_a_thousand_guests(self):
+        self.event = create_event(self.user, create_hall(seats=1200), guests=0)
+        groups = [{'name': f'Group {i}', 'guests': self.new_guests(2 + i % 9)} for i in range(170)]
+        response = self.plan(groups)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertGreaterEqual(response.data['seated'], 1000)
+        self.assertEqual(
+            Seat.objects.filter(event=self.event, is_engaged=True).count(), response.data['seated']
+        )
+
+
+class HallLayoutTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.hall = create_layout_hall(zones=2, tables=5, seats_per_table=10)
+        self.event = create_event(self.user, self.hall, guests=15)
+        self.client.credentials(**get_auth_header(self.user))
+        self.client.get(reverse('get_profile'))
+
+    def test_event_seats_come_from_the_layout(self):
+        self.assertEqual(self.hall.number_of_seats, 100)
+        self.assertEqual(Seat.objects.filter(event=self.event, table__isnull=False).count(), 100)
+
+    def test_layout_is_cached(self):
+        response = self.client.get(reverse('hole-layout', args=[self.hall.id]))
+        self.assertEqual(len(response.data['zones']), 2)
+        self.assertEqual(len(response.data['tables']), 10)
+        self.assertEqual(len(response.data['seats']), 100)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('hole-layout', args=[self.hall.id]))
+
+    def test_layout_changes_drop_the_cache(self):
+        self.client.get(reverse('hole-layout', args=[self.hall.id]))
+        Zone.objects.create(hole=self.hall, name='Terrace')
+        response = self.client.get(reverse('hole-layout', args=[self.hall.id]))
+        self.assertEqual(len(response.data['zones']), 3)
+
+    def test_free_seats_per_table_and_zone(self):
+        table = Table.objects.filter(hole=self.hall).order_by('id').first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('events-free-seats', args=[self.event.id]), {'table': table.id})
+        self.assertEqual(len(response.data), 0)
+        response = self.client.get(reverse('events-free-seats', args=[self.event.id]), {'zone': table.zone_id})
+        self.assertEqual(len(response.data), 35)
+
+    def test_table_availability(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('events-table-availability', args=[self.event.id]))
+        self.assertEqual(len(response.data), 9)
+        self.assertEqual(sum(row['free'] for row in response.data), 85)
+
+    def test_seat_map(self):
+        response = self.client.get(reverse('events-seat-map', args=[self.event.id]))
+        self.assertEqual(len(response.data['engaged']), 15)
+        self.assertEqual(len(response.data['seats']), 100)
+
+    def rebuild(self, tables, seats_per_table):
+        build_layout(self.hall, [{
+            'name': 'Main',
+            'tables': [{'name': f'T{t}', 'x': t * 2.0, 'seats': seats_per_table} for t in range(tables)],
+        }])
+
+    def test_rebuilt_layout_keeps_event_seat_links(self):
+        positions = set(SeatPosition.objects.filter(hole=self.hall).values_list('id', flat=True))
+        before = dict(Seat.objects.filter(event=self.event).values_list('id', 'version'))
+        self.rebuild(tables=4, seats_per_table=25)
+
+        self.assertEqual(set(SeatPosition.objects.filter(hole=self.hall).values_list('id', flat=True)), positions)
+        self.assertEqual(Zone.objects.filter(hole=self.hall).count(), 1)
+        self.assertEqual(Table.objects.filter(hole=self.hall).count(), 4)
+        seats = Seat.objects.filter(event=self.event).select_related('position')
+        self.assertTrue(all(seat.table_id and seat.table_id == seat.position.table_id for seat in seats))
+        moved = [seat for seat in seats if seat.version != before[seat.id]]
+        self.assertTrue(moved)
+        self.assertTrue(all(seat.version == before[seat.id] + 1 for seat in moved))
+
+        table = Table.objects.filter(hole=self.hall).order_by('id').first()
+        response = self.client.get(reverse('events-free-seats', args=[self.event.id]), {'table': table.id})
+        self.assertEqual(len(response.data), 10)
+        response = self.client.get(reverse('events-table-availability', args=[self.event.id]))
+        self.assertEqual(sum(row['free'] for row in response.data), 85)
+
+    def test_growing_the_layout_adds_positions(self):
+        self.rebuild(tables=11, seats_per_table=10)
+        self.hall.refresh_from_db()
+        self.assertEqual(self.hall.number_of_seats, 110)
+        self.assertEqual(Seat.objects.filter(event=self.event, position__isnull=False).count(), 100)
+
+    def test_seats_of_upcoming_events_cannot_be_removed(self):
+        with self.assertRaises(LayoutError):
+            self.rebuild(tables=5, seats_per_table=10)
+        self.assertEqual(SeatPosition.objects.filter(hole=self.hall).count(), 100)
+        self.assertEqual(Table.objects.filter(hole=self.hall).count(), 10)
+
+        Event.objects.filter(pk=self.event.pk).update(is_passed=True)
+        self.rebuild(tables=5, seats_per_table=10)
+        self.assertEqual(SeatPosition.objects.filter(hole=self.hall).count(), 50)
+
+    def test_planner_uses_layout_tables(self):
+        response = self.client.post(reverse('events-plan-seating', args=[self.event.id]), {
+            'groups': [{'name': 'Family', 'guests': [{'first_name': 'A', 'last_name': 'B'}] * 8}],
+            'table_size': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        tables = set(Seat.objects.filter(
+            event=self.event, number__in=response.data['groups']['Family']
+        ).values_list('table_id', flat=True))
+        self.assertEqual(len(tables), 1)
+
+
+class QuoteTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = create_hall(seats=100)
+        cls.menu, cls.options = create_menu(dishes=5, options=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def quote(self, *scenarios):
+        return self.client.post(reverse('quotes-list'), {'scenarios': list(scenarios)}, format='json')
+
+    def test_quotes_a_scenario(self):
+        response = self.quote({
+            'hole': self.hall.id,
+            'guests': 50,
+            'dishes': [{'dish': self.menu[0].id}, {'dish': self.menu[1].id, 'amount': 10}],
+            'options': [self.options[0].id],
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        quote = response.data['quotes'][0]
+        self.assertEqual(quote['dishes_price'], 50 * self.menu[0].price + 10 * self.menu[1].price)
+        self.assertEqual(quote['total'], quote['dishes_price'] + self.options[0].price)
+
+    def test_batch_is_priced_without_per_item_queries(self):
+        scenario = {
+            'hole': self.hall.id,
+            'guests': 80,
+            'dishes': [{'dish': dish.id} for dish in self.menu],
+            'options': [option.id for option in self.options],
+        }
+        self.quote(scenario)
+        with self.assertNumQueries(0):
+            response = self.quote(*[scenario] * 50)
+        self.assertEqual(len(response.data['quotes']), 50)
+
+    def test_price_changes_refresh_the_table(self):
+        scenario = {'hole': self.hall.id, 'guests': 10, 'dishes': [{'dish': self.menu[0].id}]}
+        self.quote(scenario)
+        self.menu[0].price = 1.0
+        self.menu[0].save()
+        response = self.quote(scenario)
+        self.assertEqual(response.data['quotes'][0]['total'], 10.0)
+
+    def test_rejects_unknown_items_and_oversized_parties(self):
+        response = self.quote(
+            {'hole': self.hall.id, 'guests': 10, 'dishes': [{'dish': 0}], 'options': [0]},
+            {'hole': self.hall.id, 'guests': 500},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['scenarios']), {0, 1})
+
+
+class AdminChangelistTests(APITestCase):
+    def setUp(self):
+        self.admin = create_user(is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.menu, _ = create_menu(dishes=3, options=0)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        urls = [reverse(f'admin:banket_{model}_changelist') for model in ('event', 'seat', 'ordereddish', 'guest')]
+        create_event(create_user(), create_hall(seats=5), guests=2, dishes=self.menu)
+        small = [self.count_queries(url) for url in urls]
+        for _ in range(3):
+            create_event(create_user(), create_hall(seats=20), guests=15, dishes=self.menu)
+        self.assertEqual([self.count_queries(url) for url in urls], small)
+
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_ip_bucket_allows_a_burst_then_throttles(self):
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': None, 'ip': '3/min'}}
+        with override_settings(REST_FRAMEWORK=rates):
+            codes = [self.client.get(reverse('dishes-list')).status_code for _ in range(4)]
+            response = self.client.get(reverse('hole-list'))
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_user_bucket_is_per_user(self):
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': '1/min', 'ip': None}}
+        event = create_event(create_user(), create_hall(seats=10), guests=1)
+        with override_settings(REST_FRAMEWORK=rates):
+            self.client.credentials(**get_auth_header(event.user))
+            first = self.client.get(reverse('events-event-seats', args=[event.id]))
+            second = self.client.get(reverse('events-total-price', args=[event.id]))
+            self.client.credentials(**get_auth_header(create_user()))
+            other = self.client.get(reverse('dishes-list'))
+        self.assertEqual((first.status_code, second.status_code, other.status_code), (200, 429, 200))
+
+
+    def test_bucket_is_shared_through_the_database_cache(self):
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': None, 'ip': '2/min'}}
+        database_cache = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'throttle_cache'}}
+        with override_settings(REST_FRAMEWORK=rates, CACHES=database_cache):
+            call_command('createcachetable', verbosity=0)
+            codes = []
+            for _ in range(3):
+                # A fresh backend per request, as a separate worker process would have.
+                caches['default'] = caches.create_connection('default')
+                codes.append(self.client.get(reverse('dishes-list')).status_code)
+        self.assertEqual(codes, [200, 200, 429])
+
+    def get_cache_backend(self, **environ):
+        environ = {**os.environ, 'SECRET_KEY': 'x', **environ}
+        script = 'from config import settings; print(getattr(settings, "CACHES", {}).get("default", {}).get("BACKEND"))'
+        result = subprocess.run([sys.executable, '-c', script], env=environ, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
+    def test_production_uses_a_shared_cache(self):
+        self.assertEqual(
+            self.get_cache_backend(DJANGO_PROFILE='production', REDIS_URL='redis://redis:6379/0'),
+            'django.core.cache.backends.redis.RedisCache',
+        )
+        self.assertEqual(
+            self.get_cache_backend(DJANGO_PROFILE='production', REDIS_URL=''),
+            'django.core.cache.backends.db.DatabaseCache',
+        )
+
+    def test_build_steps_can_opt_out_of_the_shared_cache(self):
+        for redis_url in ('', 'redis://redis:6379/0'):
+            self.assertEqual(
+                self.get_cache_backend(DJANGO_PROFILE='production', REDIS_URL=redis_url, LOCAL_CACHE='True'), 'None'
+            )
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return {'value': 42}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flight.do, 'key', work) for _ in range(8)]
+            while not flight.calls:
+                time.sleep(0.001)
+            time.sleep(0.05)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.calls, {})
+
+    def test_errors_are_shared_and_not_remembered(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('key', lambda: int('x'))
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+
+class BenchmarkRoutesTests(APITestCase):
+    def test_every_route_is_measured_and_succeeds(self):
+        out = StringIO()
+        call_command('benchmark_routes', repeat=2, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(sorted(report['not_measured']), ['api-root', 'events-send-invitations', 'guest-detail'])
+        failed = {route: result['status'] for route, result in report['routes'].items() if result['status'] >= 400}
+        self.assertEqual(failed, {})
+
+
+class OpenAPISchemaTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'openapi.json')
+        settings_override = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_serves_the_generated_schema_with_an_etag(self):
+        call_command('generate_schema', stdout=StringIO())
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/banket/events/', json.loads(response.content)['paths'])
+        cached = self.client.get(reverse('openapi-schema'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_regenerated_file_is_served_without_invalidation(self):
+        call_command('generate_schema', stdout=StringIO())
+        etag = self.client.get(reverse('openapi-schema'))['ETag']
+        with open(self.path, 'wb') as f:
+            f.write(b'{"swagger": "2.0", "paths": {}}')
+        os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        response = self.client.get(reverse('openapi-schema'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'swagger': '2.0', 'paths': {}})
+
+    def test_generation_needs_no_database_or_cache(self):
+        # The production database cache with an unreachable database host.
+        environ = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings', 'DJANGO_PROFILE': 'production',
+                   'LOCAL_CACHE': 'False', 'REDIS_URL': '', 'SECRET_KEY': 'x', 'HOST': 'unreachable.invalid'}
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'generate_schema', '--output', self.path],
+            cwd=settings.BASE_DIR, env=environ, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('/banket/events/', json.loads(open(self.path, 'rb').read())['paths'])
+
+    def test_missing_schema_is_not_generated_on_request(self):
+        self.assertEqual(self.client.get(reverse('openapi-schema')).status_code, 404)
+
+    def test_generation_without_drf_yasg_fails_cleanly(self):
+        with mock.patch.dict('sys.modules', {'drf_yasg.codecs': None}):
+            with self.assertRaises(CommandError):
+                call_command('generate_schema', stdout=StringIO())
+        self.assertFalse(os.path.exists(self.path))
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class IdempotencyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.hall = create_hall(seats=10)
+        self.event = create_event(self.user, self.hall, guests=2)
+        self.client.credentials(**get_auth_header(self.user))
+
+    def create_guest(self, key, seat='10', **headers):
+        return self.client.post(reverse('guest-list'), {
+            'first_name': 'Retry', 'last_name': 'Guest', 'email': 'retry@example.com',
+            'seat': seat, 'event': self.event.id,
+        }, HTTP_IDEMPOTENCY_KEY=key, **headers)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.create_guest('guest-1')
+        self.assertEqual(first.status_code, 201, first.content)
+        second = self.create_guest('guest-1')
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Guest.objects.filter(first_name='Retry').count(), 1)
+
+    def test_event_create_retry_does_not_create_seats_again(self):
+        data = {'hole': create_hall(seats=20).id, 'date_planned': '2040-01-01'}
+        for _ in range(3):
+            response = self.client.post(reverse('events-list'), data, HTTP_IDEMPOTENCY_KEY='event-1')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Seat.objects.filter(event__hole_id=data['hole']).count(), 20)
+
+    def test_invitations_are_sent_once(self):
+        data = {'man_fullname': 'John Smith', 'women_fullname': 'Jane Doe'}
+        url = reverse('events-send-invitations', args=[self.event.id])
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, data, HTTP_IDEMPOTENCY_KEY='mail-1').status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_reusing_a_key_for_another_request_is_rejected(self):
+        self.create_guest('guest-1')
+        self.assertEqual(self.create_guest('guest-1', seat='9').status_code, 422)
+
+    def test_retry_while_in_progress_conflicts(self):
+        self.create_guest('guest-1')
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        self.assertEqual(self.create_guest('guest-1').status_code, 409)
+
+    def test_abandoned_claim_is_reclaimed_after_the_lease(self):
+        self.create_guest('guest-1')
+        Guest.objects.all().delete()
+        IdempotencyKey.objects.update(
+            status_code=None, response=None,
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_LEASE + 1),
+        )
+        response = self.create_guest('guest-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(self.create_guest('guest-1').status_code, 201)
+        self.assertEqual(Guest.objects.count(), 1)
+
+    def test_failed_request_releases_the_key(self):
+        self.assertEqual(self.create_guest('guest-1', seat='99').status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.create_guest('guest-1', seat='99').status_code, 404)
+
+    def test_keys_are_scoped_per_user(self):
+        self.create_guest('guest-1')
+        other = create_user()
+        other_event = create_event(other, create_hall(seats=10), guests=0)
+        self.client.credentials(**get_auth_header(other))
+        response = self.client.post(reverse('guest-list'), {
+            'first_name': 'Other', 'last_name': 'Guest', 'seat': '10', 'event': other_event.id,
+        }, HTTP_IDEMPOTENCY_KEY='guest-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_expired_keys_are_purged_and_reusable(self):
+        self.create_guest('guest-1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1))
+        self.assertEqual(run_job('purge_idempotency_keys').rows_affected, 1)
+
+        self.create_guest('guest-1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1))
+        response = self.create_guest('guest-1', seat='9')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+
+class SchedulerTests(APITestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.hall = create_hall(seats=10)
+
+    def test_mark_passed_events(self):
+        past = [create_event(self.user, self.hall, guests=0, days_ahead=-days) for days in (1, 2)]
+        today = create_event(self.user, self.hall, guests=0, days_ahead=0)
+        upcoming = create_event(self.user, self.hall, guests=0, days_ahead=1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(mark_passed_events(), 2)
+        self.assertEqual(set(Event.objects.filter(is_passed=True)), set(past))
+        self.assertFalse(Event.objects.filter(id__in=[today.id, upcoming.id], is_passed=True).exists())
+        self.assertEqual(run_job('mark_passed_events').rows_affected, 0)
+        self.assertTrue(JobRun.objects.filter(name='mark_passed_events', succeeded=True).exists())
+
+    def test_due_jobs_follow_the_last_run(self):
+        now = timezone.now()
+        self.assertIn('mark_passed_events', get_due_jobs(now))
+
+        JobRun.objects.create(name='mark_passed_events', started_at=now - timedelta(minutes=30))
+        self.assertNotIn('mark_passed_events', get_due_jobs(now))
+        self.assertIn('mark_passed_events', get_due_jobs(now + timedelta(minutes=30)))
+
+    def test_failed_job_waits_for_its_interval(self):
+        with mock.patch.dict('apps.banket.scheduler.jobs'):
+            @register_job('broken', interval=60)
+            def broken():
+                raise RuntimeError('boom')
+
+            with self.assertLogs('apps.banket.scheduler', 'ERROR'):
+                run = run_job('broken')
+            self.assertFalse(run.succeeded)
+            self.assertIn('RuntimeError: boom', run.error)
+            self.assertNotIn('broken', get_due_jobs(run.started_at + timedelta(seconds=59)))
+            self.assertIn('broken', get_due_jobs(run.started_at + timedelta(seconds=60)))
+
+    def test_old_runs_are_purged_except_the_latest(self):
+        now = timezone.now()
+        old = now - timedelta(days=settings.JOB_RUN_RETENTION_DAYS + 1)
+        JobRun.objects.create(name='mark_passed_events', started_at=old - timedelta(days=1))
+        JobRun.objects.create(name='mark_passed_events', started_at=now)
+        kept = JobRun.objects.create(name='purge_tombstones', started_at=old)
+
+        self.assertEqual(purge_old_runs(), 1)
+        self.assertEqual(set(JobRun.objects.values_list('name', 'started_at')), {
+            ('mark_passed_events', now), ('purge_tombstones', kept.started_at),
+        })
+        self.assertIn('purge_job_runs', get_due_jobs(now))
+
+    def test_scheduler_refreshes_connections_on_each_tick(self):
+        with mock.patch('apps.banket.management.commands.run_scheduler.close_old_connections') as close, \
+                mock.patch('apps.banket.management.commands.run_scheduler.run_due_jobs', return_value=[]):
+            call_command('run_scheduler', '--once')
+        close.assert_called_once_with()
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.credentials(**get_auth_header(self.user))
+        dishes, options = create_menu(dishes=3, options=2)
+        self.event = create_event(
+            self.user, create_layout_hall(zones=1, tables=2, seats_per_table=5), guests=6, dishes=dishes,
+            options=options, days_ahead=-400, is_passed=True,
+        )
+        Guest.objects.create(user=self.user, event=self.event, first_name='Standing', last_name='Guest')
+
+    def get(self, url_name, archived=False, **kwargs):
+        response = self.client.get(reverse(url_name, kwargs=kwargs), {'archived': 'true'} if archived else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_rows_move_to_the_archive_tables(self):
+        guests = set(Guest.objects.filter(event=self.event).values_list('id', 'first_name', 'version'))
+        engaged_seats = set(
+            Seat.objects.filter(event=self.event, is_engaged=True).values_list('id', 'number', 'table_id', 'position_id')
+        )
+        ordered_dishes = set(OrderedDish.objects.filter(event=self.event).values_list('id', 'dish_id', 'amount'))
+
+        self.assertEqual(archive_event_ids([self.event.id]), len(guests) + 10 + len(ordered_dishes))
+
+        self.assertFalse(Guest.objects.filter(event=self.event).exists())
+        self.assertFalse(Seat.objects.filter(event=self.event).exists())
+        self.assertFalse(OrderedDish.objects.filter(event=self.event).exists())
+        self.assertEqual(
+            set(ArchivedGuest.objects.filter(event=self.event).values_list('original_id', 'first_name', 'version')),
+            guests,
+        )
+        self.assertEqual(
+            set(ArchivedSeat.objects.filter(event=self.event).values_list(
+                'original_id', 'number', 'table_id', 'position_id'
+            )),
+            engaged_seats,
+        )
+        self.assertEqual(
+            set(ArchivedOrderedDish.objects.filter(event=self.event).values_list('original_id', 'dish_id', 'amount')),
+            ordered_dishes,
+        )
+        self.event.refresh_from_db()
+        self.assertTrue(self.event.is_archived)
+
+    def test_archived_reads_match_live_reads(self):
+        pk = self.event.pk
+        live = {
+            'list': self.get('events-list')['results'],
+            'my_events': self.get('events-my-events'),
+            'detail': self.get('events-detail', pk=pk),
+            'guests': self.get('events-event-guests', pk=pk),
+            'seats': [seat for seat in self.get('events-event-seats', pk=pk) if seat['is_engaged']],
+            'dishes': self.get('events-my-ordered-dishes', pk=pk),
+            'total_price': self.get('events-total-price', pk=pk),
+        }
+        archive_event_ids([pk])
+        cache.clear()
+        for event in live['list'] + live['my_events'] + [live['detail']]:
+            event['is_archived'] = True
+
+        self.assertEqual(self.get('events-list', archived=True)['results'], live['list'])
+        self.assertEqual(self.get('events-my-events', archived=True), live['my_events'])
+        self.assertEqual(self.get('events-detail', archived=True, pk=pk), live['detail'])
+        self.assertEqual(self.get('events-event-guests', archived=True, pk=pk), live['guests'])
+        self.assertEqual(self.get('events-event-seats', archived=True, pk=pk), live['seats'])
+        self.assertEqual(self.get('events-my-ordered-dishes', archived=True, pk=pk), live['dishes'])
+        self.assertEqual(self.get('events-total-price', archived=True, pk=pk), live['total_price'])
+
+
+@override_settings(SYNC_CURSOR_OVERLAP=0)
+class SyncTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.menu, _ = create_menu(dishes=3, options=0)
+        self.event = create_event(self.user, create_hall(seats=20), guests=5, dishes=self.menu)
+        self.client.credentials(**get_auth_header(self.user))
+        self.client.get(reverse('get_profile'))
+        self.url = reverse('events-sync', args=[self.event.id])
+
+    def sync(self, cursor=None, budget=None):
+        data = {'cursor': cursor} if cursor else {}
+        if budget is None:
+            return self.client.get(self.url, data).data
+        with self.assertNumQueries(budget):
+            return self.client.get(self.url, data).data
+
+    def test_first_sync_returns_everything(self):
+        data = self.sync(budget=5)
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['event']['id'], self.event.id)
+        self.assertEqual((len(data['seats']), len(data['guests']), len(data['ordered_dishes'])), (20, 5, 3))
+
+    def test_sync_returns_only_changes(self):
+        cursor = self.sync()['cursor']
+        data = self.sync(cursor)
+        data.pop('cursor')
+        self.assertEqual(data, {
+            'reset': False, 'event': None, 'seats': [], 'guests': [], 'ordered_dishes': [],
+            'deleted': {'guest': [], 'ordered_dish': []},
+        })
+
+        guest = Guest.objects.filter(event=self.event).select_related('seat').first()
+        old_number = guest.seat.number
+        seats.change_seat(guest, self.event.id, '20')
+        order = OrderedDish.objects.filter(event=self.event).first()
+        self.client.delete(reverse('ordered-dishes-detail', args=[order.id]))
+
+        data = self.sync(cursor, budget=5)
+        self.assertFalse(data['reset'])
+        self.assertIsNone(data['event'])
+        self.assertEqual([row['id'] for row in data['guests']], [guest.id])
+        self.assertEqual(sorted(row['number'] for row in data['seats']), sorted([old_number, '20']))
+        self.assertEqual(data['deleted'], {'guest': [], 'ordered_dish': [order.id]})
+
+    def test_bulk_guest_deletion_leaves_tombstones(self):
+        cursor = self.sync()['cursor']
+        ids = set(Guest.objects.filter(event=self.event).values_list('id', flat=True))
+        self.client.post(reverse('guest-bulk-delete'), {'event': self.event.id})
+        data = self.sync(cursor)
+        self.assertEqual(set(data['deleted']['guest']), ids)
+        self.assertEqual(len(data['seats']), 5)
+
+    def test_event_changes_are_synced(self):
+        cursor = self.sync()['cursor']
+        self.client.patch(reverse('events-detail', args=[self.event.id]), {'description': 'Changed'})
+        data = self.sync(cursor, budget=6)
+        self.assertEqual(data['event']['description'], 'Changed')
+
+    def test_stale_cursor_resets(self):
+        Guest.objects.filter(event=self.event).first().delete()
+        stale = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+        data = self.sync(stale.isoformat())
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['guests']), 4)
+
+        Tombstone.objects.update(deleted_at=stale)
+        self.assertEqual(run_job('purge_tombstones').rows_affected, 1)
+
+    def test_foreign_event(self):
+        self.client.credentials(**get_auth_header(create_user()))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class EventCloneTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.hall = create_layout_hall(zones=1, tables=3, seats_per_table=10)
+        self.menu, self.options = create_menu(dishes=4, options=2)
+        self.event = create_event(self.user, self.hall, guests=12, dishes=self.menu, options=self.options)
+        Seat.objects.filter(event=self.event, number='1').update(description='By the window')
+        self.client.credentials(**get_auth_header(self.user))
+        self.client.get(reverse('get_profile'))
+
+    def clone(self, status_code=201, **data):
+        data.setdefault('date_planned', '2040-06-01')
+        response = self.client.post(reverse('events-clone', args=[self.event.id]), data)
+        self.assertEqual(response.status_code, status_code, response.content)
+        return response
+
+    def test_clone_copies_menu_and_options(self):
+        with self.assertNumQueries(12):
+            response = self.clone()
+        clone_id = response.data['id']
+        self.assertEqual(response.data['hole'], self.hall.id)
+        self.assertEqual(set(Event.objects.get(pk=clone_id).add_options.values_list('id', flat=True)),
+                         {option.id for option in self.options})
+        self.assertEqual(
+            sorted(OrderedDish.objects.filter(event_id=clone_id).values_list('dish_id', 'amount')),
+            sorted(OrderedDish.objects.filter(event=self.event).values_list('dish_id', 'amount')),
+        )
+        self.assertFalse(Guest.objects.filter(event_id=clone_id).exists())
+
+        seat_rows = ('number', 'description', 'position_id', 'table_id')
+        self.assertEqual(
+            sorted(Seat.objects.filter(event_id=clone_id).values_list(*seat_rows)),
+            sorted(Seat.objects.filter(event=self.event).values_list(*seat_rows)),
+        )
+        self.assertFalse(Seat.objects.filter(event_id=clone_id, is_engaged=True).exists())
+
+    def test_clone_with_guests_keeps_seat_numbers(self):
+        with self.assertNumQueries(14):
+            clone_id = self.clone(include_guests=True).data['id']
+        self.assertEqual(
+            sorted(Guest.objects.filter(event_id=clone_id).values_list('first_name', 'seat__number')),
+            sorted(Guest.objects.filter(event=self.event).values_list('first_name', 'seat__number')),
+        )
+        self.assertEqual(Seat.objects.filter(event_id=clone_id, is_engaged=True).count(), 12)
+
+    def test_clone_gets_the_current_hall_layout(self):
+        build_layout(self.hall, [{
+            'name': 'Main', 'tables': [{'name': f'T{t}', 'seats': 10} for t in range(4)],
+        }])
+        clone_id = self.clone(include_guests=True).data['id']
+        self.assertEqual(
+            sorted(Seat.objects.filter(event_id=clone_id).values_list('number', 'position_id', 'table_id')),
+            sorted(SeatPosition.objects.filter(hole=self.hall).values_list('number', 'id', 'table_id')),
+        )
+        self.assertEqual(Seat.objects.get(event_id=clone_id, number='1').description, 'By the window')
+        self.assertEqual(Seat.objects.filter(event_id=clone_id, is_engaged=True).count(), 12)
+
+    def test_clone_gets_the_current_seat_count(self):
+        hall = create_hall(seats=10)
+        event = create_event(self.user, hall, guests=3)
+        hall.number_of_seats = 15
+        hall.save()
+        response = self.client.post(reverse('events-clone', args=[event.id]), {'date_planned': '2040-06-01'})
+        self.assertEqual(Seat.objects.filter(event_id=response.data['id']).count(), 15)
+
+    def test_clone_into_another_hall(self):
+        hall = create_hall(seats=5)
+        clone_id = self.clone(hole=hall.id, include_guests=True, description='Reunion').data['id']
+        clone = Event.objects.get(pk=clone_id)
+        self.assertEqual(clone.description, 'Reunion')
+        self.assertEqual(Seat.objects.filter(event=clone).count(), 5)
+        self.assertEqual(Guest.objects.filter(event=clone).count(), 12)
+        self.assertEqual(Seat.objects.filter(event=clone, is_engaged=True).count(),
+                         Guest.objects.filter(event=clone, seat__isnull=False).count())
+
+    def test_clone_of_an_archived_event(self):
+        archive_event_ids([self.event.id])
+        clone_id = self.clone(include_guests=True).data['id']
+        self.assertEqual(Seat.objects.filter(event_id=clone_id).count(), 30)
+        self.assertEqual(Guest.objects.filter(event_id=clone_id, seat__isnull=False).count(), 12)
+        self.assertEqual(OrderedDish.objects.filter(event_id=clone_id).count(), 4)
+
+    def test_clone_onto_a_booked_date(self):
+        self.clone()
+        self.clone(status_code=400)
+        self.assertEqual(Event.objects.filter(date_planned='2040-06-01').count(), 1)
+
+    def test_clone_of_a_foreign_event(self):
+        self.client.credentials(**get_auth_header(create_user()))
+        self.clone(status_code=404)
@@ -0,0 +1,73 @@
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket kept in the default cache, which production configures as a
+    backend shared by all workers (see CACHES in settings); with a
+    per-process cache every worker would get its own bucket. A rate of
+    'N/period' is a bucket of N tokens refilled at N per period, so clients
+    may burst up to N requests and then proceed at the steady rate. The
+    read-modify-write is not atomic across processes; a race lets a request
+    or two through, which is an acceptable trade for one cache round trip
+    each way.
+    """
+    scope = None
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def parse_rate(self, rate):
+        capacity, period = rate.split('/')
+        return int(capacity), PERIODS[period[0]]
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        if rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        capacity, period = self.parse_rate(rate)
+        refill = capacity / period
+        now = time.time()
+        tokens, updated_at = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill)
+        self.wait_time = 0 if tokens >= 1 else (1 - tokens) / refill
+        if tokens >= 1:
+            tokens -= 1
+        cache.set(key, (tokens, now), period)
+        return self.wait_time == 0
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+HOT_READ_THROTTLES = (UserTokenBucketThrottle, IPTokenBucketThrottle)
@@ -1,5 +1,6 @@
 from rest_framework.routers import DefaultRouter
-from apps.banket.views import EventViewSet, DishViewSet, CommentViewSet, OrderedDishViewSet, HoleViewSet, GuestViewSet
+from apps.banket.views import EventViewSet, DishViewSet, CommentViewSet, OrderedDishViewSet, HoleViewSet, GuestViewSet, \
+    QuoteViewSet
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='events')
@@ -8,5 +9,6 @@ router.register(r'comments', CommentViewSet, basename='comments')
 router.register(r'order', OrderedDishViewSet, basename='ordered-dishes')
 router.register(r'hole', HoleViewSet, basename='hole')
 router.register(r'guest', GuestViewSet, basename='guest')
+router.register(r'quotes', QuoteViewSet, basename='quotes')
 
 urlpatterns = router.urls
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 from django.core.mail import EmailMultiAlternatives
-from django.db.models import Sum, F
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum, F
+from django.utils import timezone
 from django.template.loader import get_template
 from django_filters.rest_framework import DjangoFilterBackend
 from django.template import Context
@@ -7,81 +11,165 @@ from rest_framework import viewsets, status, views
 from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin, DestroyModelMixin, ListModelMixin
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import get_object_or_404
 from rest_framework.serializers import Serializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from apps.banket.helpers import get_weekday_name
-from apps.banket.models import Event, Dish, Comment, OrderedDish, Hole, Guest, Seat, AdditionalOptions
+from apps.banket.coalescing import coalesce
+from apps.banket.filters import FullTextSearchFilter
+from apps.banket.helpers import get_weekday_name, get_halls_availability
+from apps.banket.idempotency import idempotent
+from apps.banket.layout import get_layout
+from apps.banket.paginators import FeedCursorPagination
+from apps.banket.pricing import price_table
+from apps.banket.models import Event, Dish, Comment, OrderedDish, Hole, Guest, Seat, AdditionalOptions, \
+    ArchivedSeat, ArchivedGuest, ArchivedOrderedDish
 from apps.banket.permissions import IsOwnerOrReadOnly
+from apps.banket import cloning, planner, seats, sync
 from apps.banket.serializers import EventSerializer, DishSerializer, CommentSerializer, OrderedDishSerializer, \
     HoleSerializer, GuestSerializer, SeatChangeSerializer, AdditionalOptionsSerializer, \
     AdditionalOptionsChangeSerializer, EventDetailSerializer, InvitationSerializer, EventListSerializer, SeatSerializer, \
-    MyOrderedDishesListSerializer
+    MyOrderedDishesListSerializer, AvailabilitySerializer, ArchivedSeatSerializer, ArchivedGuestSerializer, \
+    ArchivedOrderedDishSerializer, GuestBulkDeleteSerializer, SeatingPlanSerializer, \
+    FreeSeatsFilterSerializer, QuoteSerializer, SyncSerializer, EventCloneSerializer
+from apps.banket.throttling import HOT_READ_THROTTLES
+from apps.users.authentication import CachedJWTAuthentication
 
 from config.settings import EMAIL_HOST_USER
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class OwnerQuerysetMixin:
+    owner_field = 'user'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        return queryset.filter(**{self.owner_field: self.request.user})
+
+
+class EventViewSet(OwnerQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = EventSerializer
     queryset = Event.objects.all()
-    filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter,)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter, OrderingFilter,)
     filter_fields = (
         'event_type',
         'is_passed',
     )
+    # The same columns as the search_vector trigger in migration 0008, so the
+    # fallback lookups match what PostgreSQL searches.
     search_fields = (
         'description',
+        'event_type',
     )
     ordering_fields = (
         'id',
     )
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        user = self.request.user
-        serializer.save(user=user, hole_id=1)
+        self.save_booking(serializer, user=self.request.user)
+
+    def perform_update(self, serializer):
+        self.save_booking(serializer)
+
+    def save_booking(self, serializer, **kwargs):
+        # The serializer rejects booked dates up front; the unique constraint
+        # catches the concurrent requests that pass that check together.
+        try:
+            with transaction.atomic():
+                serializer.save(**kwargs)
+        except IntegrityError:
+            raise ValidationError({'date_planned': 'The hall is already booked for this date.'})
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = EventDetailSerializer(instance)
-        if instance.user == self.request.user:
-            return Response(data=serializer.data, status=status.HTTP_200_OK)
-        return Response(data='Вы не можете просматривать чужие мероприятия', status=status.HTTP_403_FORBIDDEN)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+    def wants_archive(self):
+        return self.request.query_params.get('archived') in ('1', 'true', 'True')
 
     @action(methods=['GET'], detail=False, serializer_class=EventListSerializer, url_path='my-events')
     def my_events(self, request, *args, **kwargs):
-        queryset = self.queryset.filter(user=self.request.user)
+        queryset = self.get_queryset().with_totals()
         serializer = self.get_serializer(queryset, many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
-    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='event-seats')
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='event-seats',
+            throttle_classes=HOT_READ_THROTTLES)
     def event_seats(self, request, *args, **kwargs):
-        queryset = Seat.objects.filter(event_id=kwargs['pk']).order_by('id')
-        serializer = SeatSerializer(queryset, many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        def get_data():
+            if self.wants_archive():
+                queryset = ArchivedSeat.objects.filter(event_id=kwargs['pk'], event__user=self.request.user)
+                return ArchivedSeatSerializer(queryset.order_by('original_id'), many=True).data
+            queryset = Seat.objects.filter(event_id=kwargs['pk'], event__user=self.request.user)
+            return SeatSerializer(queryset.order_by('id'), many=True).data
+
+        return Response(data=coalesce(request, get_data), status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True, serializer_class=FreeSeatsFilterSerializer, url_path='free-seats')
+    def free_seats(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        queryset = Seat.objects.filter(event_id=kwargs['pk'], event__user=self.request.user, is_engaged=False)
+        if 'table' in serializer.validated_data:
+            queryset = queryset.filter(table_id=serializer.validated_data['table'])
+        if 'zone' in serializer.validated_data:
+            queryset = queryset.filter(table__zone_id=serializer.validated_data['zone'])
+        return Response(data=SeatSerializer(queryset.order_by('id'), many=True).data, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='table-availability')
+    def table_availability(self, request, *args, **kwargs):
+        queryset = Seat.objects.filter(
+            event_id=kwargs['pk'], event__user=self.request.user, is_engaged=False, table__isnull=False
+        ).values('table_id').annotate(free=Count('id')).order_by('table_id')
+        data = [{'table': row['table_id'], 'free': row['free']} for row in queryset]
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='seat-map')
+    def seat_map(self, request, *args, **kwargs):
+        instance = self.get_object()
+        engaged = Seat.objects.filter(event=instance, is_engaged=True).values_list('number', flat=True)
+        return Response(data={**get_layout(instance.hole_id), 'engaged': list(engaged)}, status=status.HTTP_200_OK)
 
     @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='event-guests')
     def event_guests(self, request, *args, **kwargs):
-        queryset = Guest.objects.filter(event_id=kwargs['pk']).order_by('id')
-        serializer = GuestSerializer(queryset, many=True)
+        if self.wants_archive():
+            queryset = ArchivedGuest.objects.filter(event_id=kwargs['pk'], user=self.request.user).select_related('user')
+            serializer = ArchivedGuestSerializer(queryset.order_by('original_id'), many=True)
+        else:
+            queryset = Guest.objects.filter(
+                event_id=kwargs['pk'], user=self.request.user
+            ).select_related('user', 'seat')
+            serializer = GuestSerializer(queryset.order_by('id'), many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
-    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='total-price')
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='total-price',
+            throttle_classes=HOT_READ_THROTTLES)
     def total_price(self, request, *args, **kwargs):
-        instance = self.get_object()
-        dishes_price = OrderedDish.objects.filter(
-            user=self.request.user,
-            event=instance
-        ).aggregate(
-            total=Sum(F('amount') * F('dish__price'))
-        )['total']
-        options_price = instance.get_options_price
-        if not dishes_price:
-            return Response(data={"price": options_price}, status=status.HTTP_200_OK)
-        return Response(data={"price": dishes_price + options_price}, status=status.HTTP_200_OK)
+        def get_data():
+            instance = self.get_object()
+            ordered_dishes = ArchivedOrderedDish if instance.is_archived else OrderedDish
+            dishes_price = ordered_dishes.objects.filter(
+                user=self.request.user,
+                event=instance
+            ).aggregate(
+                total=Sum(F('amount') * F('dish__price'))
+            )['total']
+            options_price = instance.get_options_price
+            if not dishes_price:
+                return {"price": options_price}
+            return {"price": dishes_price + options_price}
+
+        return Response(data=coalesce(request, get_data), status=status.HTTP_200_OK)
 
     @action(methods=['PATCH'], detail=True, serializer_class=AdditionalOptionsChangeSerializer, url_path='add-options')
     def add_options(self, request, *args, **kwargs):
@@ -109,11 +197,75 @@ class EventViewSet(viewsets.ModelViewSet):
 
     @action(methods=['GET'], detail=True, serializer_class=MyOrderedDishesListSerializer, url_path='my-ordered-dishes')
     def my_ordered_dishes(self, request, *args, **kwargs):
-        queryset = OrderedDish.objects.filter(user=self.request.user, event_id=kwargs['pk'])
-        serializer = self.get_serializer(queryset, many=True)
+        if self.wants_archive():
+            queryset = ArchivedOrderedDish.objects.filter(
+                user=self.request.user, event_id=kwargs['pk']
+            ).select_related('dish')
+            serializer = ArchivedOrderedDishSerializer(queryset, many=True)
+        else:
+            queryset = OrderedDish.objects.filter(
+                user=self.request.user, event_id=kwargs['pk']
+            ).select_related('dish')
+            serializer = self.get_serializer(queryset, many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
+    @action(methods=['POST'], detail=True, serializer_class=SeatingPlanSerializer, url_path='plan-seating')
+    def plan_seating(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        guest_ids = [guest_id for group in data['groups'] for guest_id in group['guest_ids']]
+        guests = Guest.objects.filter(user=request.user, event=instance, id__in=guest_ids).in_bulk()
+        missing = set(guest_ids) - set(guests)
+        if missing:
+            raise ValidationError({'groups': f'Unknown guests: {", ".join(map(str, sorted(missing)))}.'})
+
+        groups = {
+            group['name']: {
+                'existing': [guests[guest_id] for guest_id in group['guest_ids']],
+                'new': [Guest(**guest) for guest in group['guests']],
+                'keep_together': group['keep_together'],
+            }
+            for group in data['groups']
+        }
+        free_seats = Seat.objects.filter(event=instance, is_engaged=False).values_list('id', 'number', 'table_id')
+        try:
+            assignments = planner.plan_seating(
+                planner.group_seats_by_table(free_seats, data['table_size']),
+                [(name, len(group['existing']) + len(group['new']), group['keep_together'])
+                 for name, group in groups.items()],
+                data['apart'],
+            )
+        except planner.SeatingError as error:
+            raise ValidationError({'groups': str(error)})
+        seated = planner.apply_seating(instance, request.user, groups, assignments)
+
+        return Response(data={
+            'seated': seated,
+            'groups': {name: [number for _, number in seats] for name, seats in assignments.items()},
+        }, status=status.HTTP_200_OK)
+
+    @action(methods=['POST'], detail=True, serializer_class=EventCloneSerializer, url_path='clone')
+    @idempotent
+    def clone(self, request, *args, **kwargs):
+        source = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        event = cloning.clone_event(source, request.user, **serializer.validated_data)
+        return Response(data=EventSerializer(event).data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['GET'], detail=True, serializer_class=SyncSerializer, url_path='sync')
+    def sync(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        event = get_object_or_404(self.get_queryset().values(*sync.EVENT_FIELDS), pk=kwargs['pk'])
+        data = sync.get_changes(event, serializer.validated_data.get('cursor'))
+        return Response(data=data, status=status.HTTP_200_OK)
+
     @action(methods=['POST'], detail=True, serializer_class=InvitationSerializer, url_path='send-invitations')
+    @idempotent
     def send_invitations(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(data=request.data)
@@ -154,17 +306,42 @@ class EventViewSet(viewsets.ModelViewSet):
 
 class DishViewSet(viewsets.GenericViewSet):
     permission_classes = (AllowAny,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = DishSerializer
     queryset = Dish.objects.all()
+    filter_backends = (FullTextSearchFilter,)
+    search_fields = (
+        'name',
+        'description',
+        'dish_type',
+    )
+    trigram_search_fields = (
+        'name',
+    )
+    throttle_classes = HOT_READ_THROTTLES
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def get_data():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
+
+        return Response(coalesce(request, get_data), status=status.HTTP_200_OK)
+
+
+class QuoteViewSet(viewsets.GenericViewSet):
+    permission_classes = (AllowAny,)
+    authentication_classes = (CachedJWTAuthentication,)
+    serializer_class = QuoteSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quotes = [price_table.quote(**scenario) for scenario in serializer.validated_data['scenarios']]
+        return Response(data={'quotes': quotes}, status=status.HTTP_200_OK)
 
 
 class CommentViewSet(
+    OwnerQuerysetMixin,
     viewsets.GenericViewSet,
     CreateModelMixin,
     RetrieveModelMixin,
@@ -172,9 +349,16 @@ class CommentViewSet(
     ListModelMixin
 ):
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = CommentSerializer
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('user').only(
+        'id', 'text', 'created_at', 'user__id', 'user__first_name', 'user__last_name', 'user__email',
+    )
+    pagination_class = FeedCursorPagination
+    filter_backends = (FullTextSearchFilter,)
+    search_fields = (
+        'text',
+    )
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -182,16 +366,21 @@ class CommentViewSet(
 
 
 class OrderedDishViewSet(
+    OwnerQuerysetMixin,
     viewsets.GenericViewSet,
     CreateModelMixin,
     RetrieveModelMixin,
     DestroyModelMixin
 ):
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = OrderedDishSerializer
     queryset = OrderedDish.objects.all()
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         serializer.save(user=user)
@@ -204,36 +393,100 @@ class HoleViewSet(
 ):
     permission_classes = (AllowAny,)
     serializer_class = HoleSerializer
-    queryset = Hole.objects.all()
+    queryset = Hole.objects.prefetch_related('images')
+    throttle_classes = HOT_READ_THROTTLES
+
+    def list(self, request, *args, **kwargs):
+        data = coalesce(request, lambda: ListModelMixin.list(self, request, *args, **kwargs).data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = coalesce(request, lambda: RetrieveModelMixin.retrieve(self, request, *args, **kwargs).data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_availability(self, halls, events):
+        today = timezone.localdate()
+        serializer = AvailabilitySerializer(data={
+            'date_from': self.request.query_params.get('date_from', today),
+            'date_to': self.request.query_params.get('date_to', today + timedelta(days=30)),
+        })
+        serializer.is_valid(raise_exception=True)
+        date_from = serializer.validated_data['date_from']
+        date_to = serializer.validated_data['date_to']
+
+        booked = events.filter(
+            date_planned__range=(date_from, date_to),
+        ).values_list('hole_id', 'date_planned').order_by('hole_id', 'date_planned')
+        return get_halls_availability(halls, booked, date_from, date_to)
+
+    @action(methods=['GET'], detail=False, serializer_class=Serializer, url_path='availability')
+    def availability(self, request, *args, **kwargs):
+        halls = list(self.get_queryset().order_by('id').values('id', 'name'))
+        events = Event.objects.filter(hole__isnull=False)
+        return Response(data=self.get_availability(halls, events), status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='availability')
+    def hall_availability(self, request, *args, **kwargs):
+        hall = self.get_object()
+        data = self.get_availability([{'id': hall.id, 'name': hall.name}], Event.objects.filter(hole=hall))
+        return Response(data=data[0], status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='layout')
+    def layout(self, request, *args, **kwargs):
+        hall_id = get_object_or_404(Hole.objects.values_list('id', flat=True), pk=kwargs['pk'])
+        return Response(data=get_layout(hall_id), status=status.HTTP_200_OK)
 
 
 class GuestViewSet(
+    OwnerQuerysetMixin,
     viewsets.GenericViewSet,
     ListModelMixin,
     CreateModelMixin,
     DestroyModelMixin,
 ):
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = GuestSerializer
-    queryset = Guest.objects.all()
+    queryset = Guest.objects.select_related('user', 'seat')
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         user = self.request.user
-        seat = Seat.objects.filter(number=self.request.data['seat'], event_id=self.request.data['event']).first()
-        seat.take_the_place()
-        serializer.save(user=user, seat=seat)
+        event = serializer.validated_data['event']
+        number = serializer.validated_data.pop('seat')
+        with transaction.atomic():
+            seat_id = seats.engage_seat(event.id, number)
+            serializer.save(user=user, seat_id=seat_id)
 
     @action(methods=['POST'], detail=True, serializer_class=SeatChangeSerializer, url_path='change-seat')
     def change_seat(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        new_seat = Seat.objects.filter(number=self.request.data['seat_number'],
-                                       event_id=self.request.data['event_id']).first()
-        serializer.save(seat_id=new_seat)
-        new_seat.take_the_place()
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        if serializer.validated_data['event_id'] != str(instance.event_id):
+            raise ValidationError({'event_id': 'Guests can only change seats within their own event.'})
+        guest = seats.change_seat(
+            instance,
+            instance.event_id,
+            serializer.validated_data['seat_number'],
+            serializer.validated_data.get('version'),
+        )
+        return Response(data={**serializer.data, 'version': guest.version}, status=status.HTTP_200_OK)
+
+    @action(methods=['POST'], detail=False, serializer_class=GuestBulkDeleteSerializer, url_path='bulk-delete')
+    def bulk_delete(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.get_queryset()
+        if 'ids' in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        if 'event' in serializer.validated_data:
+            queryset = queryset.filter(event=serializer.validated_data['event'])
+        deleted, _ = queryset.delete()
+        return Response(data={'deleted': deleted}, status=status.HTTP_200_OK)
 
     @action(methods=['GET'], detail=True, serializer_class=Serializer, url_path='make-seat-free')
     def make_seat_free(self, request, *args, **kwargs):
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.metrics'
+
+    def ready(self):
+        from apps.metrics.instrumentation import instrument_serializers
+        instrument_serializers()
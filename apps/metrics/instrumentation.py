@@ -0,0 +1,94 @@
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+from apps.metrics.registry import registry
+
+request_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+
+def record_query(execute, sql, params, many, context):
+    stats = request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def instrument_serializers():
+    if getattr(BaseSerializer.data.fget, 'instrumented', False):
+        return
+    original = BaseSerializer.data.fget
+
+    def data(self):
+        stats = request_stats.get()
+        if stats is None:
+            return original(self)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_time += time.perf_counter() - start
+
+    instrumented = property(data)
+    instrumented.fget.instrumented = True
+    BaseSerializer.data = instrumented
+
+
+class InstrumentationMiddleware:
+    """
+    Records wall time, query count, query time, serializer time and response
+    size for every request, adds a Server-Timing header and feeds the
+    per-route histograms exposed at /metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        duration = time.perf_counter() - start
+
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={duration * 1000:.2f}',
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.db_queries} queries"',
+            f'serializer;dur={stats.serializer_time * 1000:.2f}',
+        ))
+
+        match = request.resolver_match
+        registry.observe(match.view_name if match else 'unmatched', request.method, response.status_code, {
+            'http_request_duration_seconds': duration,
+            'http_request_db_queries': stats.db_queries,
+            'http_request_db_duration_seconds': stats.db_time,
+            'http_request_serializer_duration_seconds': stats.serializer_time,
+            'http_response_size_bytes': size,
+        })
+        return response
@@ -0,0 +1,95 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ('development', 'production')
+
+# Starts a worker the way WSGI does: settings, app registry, URLconf and
+# middleware, then reports wall time and peak RSS.
+STARTUP_SCRIPT = '''
+import json, resource, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+print(json.dumps({
+    'startup_ms': (time.perf_counter() - start) * 1000,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+
+def parse_import_times(stderr):
+    """
+    Parses `python -X importtime` output into cumulative microseconds per
+    top-level import and self microseconds per root package.
+    """
+    top_level = {}
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        packages[module.split('.')[0]] += int(self_us)
+        if name[1:2] != ' ':
+            top_level[module] = int(cumulative_us)
+    return top_level, dict(packages)
+
+
+class Command(BaseCommand):
+    help = 'Starts fresh worker processes under each settings profile and reports cold-start time, ' \
+           'peak RSS and the slowest imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', choices=PROFILES,
+                            help='Settings profile to measure; repeat for several. Defaults to all.')
+        parser.add_argument('--runs', type=int, default=3, help='Cold starts per profile; medians are reported.')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest packages to list.')
+        parser.add_argument('--without', action='append', default=[], metavar='MODULE',
+                            help='Make a module unimportable, to preview a slimmer install; repeatable.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        report = {}
+        for profile in options['profile'] or PROFILES:
+            runs = [self.start_worker(profile, options['without']) for _ in range(options['runs'])]
+            packages = defaultdict(list)
+            for run in runs:
+                for package, self_us in run['packages'].items():
+                    packages[package].append(self_us)
+            slowest = sorted(
+                ((package, statistics.median(times) / 1000) for package, times in packages.items()),
+                key=lambda item: -item[1],
+            )[:options['top']]
+            report[profile] = {
+                'startup_ms': round(statistics.median(run['startup_ms'] for run in runs), 1),
+                'max_rss_mb': round(statistics.median(run['max_rss_kb'] for run in runs) / 1024, 1),
+                'modules': statistics.median(len(run['top_level']) for run in runs),
+                'slowest_packages_ms': {package: round(ms, 1) for package, ms in slowest},
+            }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def start_worker(self, profile, without=()):
+        env = {**os.environ, 'DJANGO_PROFILE': profile}
+        script = f'import sys; sys.modules.update(dict.fromkeys({list(without)!r}))\n' + STARTUP_SCRIPT
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'Worker failed to start under the {profile} profile:\n{result.stderr[-2000:]}')
+        top_level, packages = parse_import_times(result.stderr)
+        return {**json.loads(result.stdout.strip().splitlines()[-1]), 'top_level': top_level, 'packages': packages}
@@ -0,0 +1,86 @@
+import bisect
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-memory histograms and counters of one process. Nothing is shared
+    between workers: /metrics/ on a worker exposes that worker's requests.
+    """
+
+    metrics = (
+        ('http_request_duration_seconds', 'Wall time spent in the view, per route.', DURATION_BUCKETS),
+        ('http_request_db_queries', 'Database queries executed per request, per route.', QUERY_BUCKETS),
+        ('http_request_db_duration_seconds', 'Time spent in database queries per request, per route.',
+         DURATION_BUCKETS),
+        ('http_request_serializer_duration_seconds', 'Time spent producing serializer data per request, per route.',
+         DURATION_BUCKETS),
+        ('http_response_size_bytes', 'Response body size, per route.', SIZE_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.responses = {}
+
+    def observe(self, route, method, status_code, values):
+        labels = (route, method)
+        with self.lock:
+            for name, _, buckets in self.metrics:
+                key = (name, labels)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(buckets)
+                self.histograms[key].observe(values[name])
+            key = labels + (str(status_code),)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.responses.clear()
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# HELP http_responses_total Responses sent, per route and status code.')
+            lines.append('# TYPE http_responses_total counter')
+            for (route, method, status_code), value in sorted(self.responses.items()):
+                lines.append(
+                    f'http_responses_total{{route="{route}",method="{method}",status="{status_code}"}} {value}'
+                )
+
+            for name, description, _ in self.metrics:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, (route, method)), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'route="{route}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
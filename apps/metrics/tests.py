@@ -0,0 +1,120 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APITestCase
+
+from apps.banket.factories import create_user, create_hall, create_event, get_auth_header
+from apps.metrics.instrumentation import RequestStats, instrument_serializers, request_stats
+from apps.metrics.registry import registry
+
+
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = create_user()
+        create_event(self.user, create_hall(seats=10), guests=5)
+        self.client.credentials(**get_auth_header(self.user))
+
+    def test_server_timing_header(self):
+        url = reverse('events-event-guests', kwargs={'pk': self.user.event_set.get().pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        timing = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertEqual(set(timing), {'total', 'db', 'serializer'})
+        self.assertGreater(float(timing['total']), 0)
+        self.assertGreater(float(timing['serializer']), 0)
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+
+    def test_query_count_is_recorded_per_route(self):
+        url = reverse('events-list')
+        executed = 0
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            executed += len(queries)
+
+        histogram = registry.histograms['http_request_db_queries', ('events-list', 'GET')]
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.sum, executed)
+        self.assertEqual(registry.responses['events-list', 'GET', '200'], 2)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsViewTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        registry.observe('events-list', 'GET', 200, {
+            'http_request_duration_seconds': 0.02,
+            'http_request_db_queries': 3,
+            'http_request_db_duration_seconds': 0.001,
+            'http_request_serializer_duration_seconds': 0.004,
+            'http_response_size_bytes': 2000,
+        })
+
+    def get(self, **kwargs):
+        return self.client.get(reverse('metrics'), **kwargs)
+
+    def test_render(self):
+        response = self.get(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode().splitlines()
+        self.assertIn('http_responses_total{route="events-list",method="GET",status="200"} 1', lines)
+        self.assertIn('# TYPE http_request_db_queries histogram', lines)
+        self.assertIn('http_request_db_queries_bucket{route="events-list",method="GET",le="2"} 0', lines)
+        self.assertIn('http_request_db_queries_bucket{route="events-list",method="GET",le="5"} 1', lines)
+        self.assertIn('http_request_db_queries_bucket{route="events-list",method="GET",le="+Inf"} 1', lines)
+        self.assertIn('http_request_db_queries_sum{route="events-list",method="GET"} 3.0', lines)
+        self.assertIn('http_response_size_bytes_count{route="events-list",method="GET"} 1', lines)
+
+    def test_requires_the_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_denied_without_a_configured_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_superuser_session(self):
+        user = create_user(is_staff=True)
+        self.client.force_login(user)
+        self.assertEqual(self.get().status_code, 403)
+        User.objects.filter(pk=user.pk).update(is_superuser=True)
+        self.assertEqual(self.get().status_code, 200)
+
+
+class SerializerInstrumentationTests(SimpleTestCase):
+    class PointSerializer(serializers.Serializer):
+        x = serializers.IntegerField()
+        y = serializers.IntegerField()
+
+    def test_data_is_patched_once(self):
+        patched = BaseSerializer.data
+        self.assertTrue(patched.fget.instrumented)
+        instrument_serializers()
+        self.assertIs(BaseSerializer.data, patched)
+
+    def test_data_outside_a_request(self):
+        self.assertEqual(self.PointSerializer({'x': 1, 'y': 2}).data, {'x': 1, 'y': 2})
+
+    def test_nested_data_is_timed_once(self):
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        try:
+            data = self.PointSerializer([{'x': 1, 'y': 2}, {'x': 3, 'y': 4}], many=True).data
+        finally:
+            request_stats.reset(token)
+        self.assertEqual(data, [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}])
+        self.assertGreater(stats.serializer_time, 0)
+        self.assertEqual(stats.serializer_depth, 0)
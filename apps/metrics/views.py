@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from apps.metrics.registry import registry
+
+
+def is_allowed(request):
+    # Not is_staff: self-registered accounts are staff.
+    if request.user.is_active and request.user.is_superuser:
+        return True
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+
+
+def metrics(request):
+    # Route names, volumes and timings are not public: without METRICS_TOKEN
+    # only superuser sessions (e.g. logged in through the admin) can read them.
+    # The registry lives in process memory, so each worker reports only the
+    # requests it served; scrape every worker and aggregate in Prometheus.
+    if not is_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+TOKEN_CACHE_PREFIX = 'jwt-token:'
+USER_CACHE_PREFIX = 'jwt-user:'
+
+
+def user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def invalidate_cached_users(user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that remembers verified tokens and resolved users for
+    JWT_AUTH_CACHE_TIMEOUT seconds, so an authenticated request normally
+    costs no database queries for authentication.
+
+    Saving or deleting a User drops its cached copy (see apps.users.models).
+    That only reaches every worker when the default cache is shared, as it is
+    in production. QuerySet.update() sends no signals: after a bulk update,
+    call invalidate_cached_users() or the old user (including is_active) is
+    served for up to JWT_AUTH_CACHE_TIMEOUT seconds.
+    """
+
+    def get_validated_token(self, raw_token):
+        key = TOKEN_CACHE_PREFIX + hashlib.sha256(raw_token).hexdigest()
+        token_class_name = cache.get(key)
+        if token_class_name is not None:
+            for AuthToken in api_settings.AUTH_TOKEN_CLASSES:
+                if AuthToken.__name__ == token_class_name:
+                    token = AuthToken(raw_token, verify=False)
+                    try:
+                        token.check_exp()
+                    except TokenError:
+                        # Expired: let the full check below build the 401.
+                        break
+                    return token
+
+        token = super().get_validated_token(raw_token)
+        expires_in = (datetime_from_epoch(token['exp']) - aware_utcnow()).total_seconds()
+        timeout = min(settings.JWT_AUTH_CACHE_TIMEOUT, int(expires_in))
+        if timeout > 0:
+            cache.set(key, token.__class__.__name__, timeout)
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.JWT_AUTH_CACHE_TIMEOUT)
+        elif not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
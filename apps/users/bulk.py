@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+IMPORT_BATCH_SIZE = 500
+
+
+def setup_worker():
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hashes passwords in a pool of processes; PBKDF2 holds the GIL, so threads
+    would not run in parallel.
+    """
+    if workers == 1:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=32))
+
+
+def import_users(rows, workers=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Creates users from dicts with email, password and optional first_name and
+    last_name, the way registration does. Emails that are already registered
+    (as a username or an email) or repeated in `rows` are skipped. Returns
+    (created, skipped), counting the rows actually inserted.
+    """
+    unique = {}
+    for row in rows:
+        unique.setdefault(row['email'].strip(), row)
+    emails = list(unique)
+    for start in range(0, len(emails), batch_size):
+        batch = emails[start:start + batch_size]
+        registered = User.objects.filter(Q(username__in=batch) | Q(email__in=batch)).values_list('username', 'email')
+        for username, email in registered:
+            unique.pop(username, None)
+            unique.pop(email, None)
+
+    hashes = hash_passwords([row['password'] for row in unique.values()], workers)
+    users = [
+        User(
+            username=email,
+            email=email,
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            password=password,
+        ) for (email, row), password in zip(unique.items(), hashes)
+    ]
+    created = 0
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        User.objects.bulk_create(batch, ignore_conflicts=True)
+        # Rows registered concurrently are skipped without an error and
+        # ignore_conflicts returns no ids; salted hashes tell ours apart.
+        hashes = {user.username: user.password for user in batch}
+        stored = User.objects.filter(username__in=hashes).values_list('username', 'password')
+        created += sum(1 for username, password in stored if hashes[username] == password)
+    return created, len(rows) - created
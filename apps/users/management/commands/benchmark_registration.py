@@ -0,0 +1,71 @@
+import json
+import statistics
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.users.bulk import import_users
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures registrations per second through the API and users per second through the bulk import, ' \
+           'for one or more PBKDF2 iteration counts. Everything is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=30, help='Registrations through the API per run.')
+        parser.add_argument('--bulk', type=int, default=300, help='Users per bulk import run.')
+        parser.add_argument('--iterations', type=int, action='append',
+                            help='PBKDF2 iteration counts to compare; repeatable. Defaults to the current setting.')
+        parser.add_argument('--workers', type=int, help='Hashing processes for the bulk import.')
+
+    def handle(self, *args, **options):
+        report = {}
+        for iterations in options['iterations'] or [settings.PASSWORD_HASH_ITERATIONS]:
+            with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+                try:
+                    with transaction.atomic():
+                        report[iterations] = {
+                            'api': self.register(options['count']),
+                            'bulk': self.bulk_import(options['bulk'], options['workers']),
+                        }
+                        raise Rollback
+                except Rollback:
+                    pass
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def register(self, count):
+        client = Client()
+        url = reverse('token_register')
+        timings = []
+        queries = 0
+        for i in range(count):
+            data = {'email': f'bench-{uuid4().hex}@example.com', 'password': 'Banket-pass-123',
+                    'first_name': 'Bench', 'last_name': 'Mark'}
+            with CaptureQueriesContext(connection) as captured:
+                began = time.perf_counter()
+                response = client.post(url, data)
+                timings.append(time.perf_counter() - began)
+            assert response.status_code == 201, response.content
+            queries += len(captured)
+        return {
+            'registrations_per_second': round(count / sum(timings), 1),
+            'p50_ms': round(statistics.median(timings) * 1000, 1),
+            'queries_per_registration': round(queries / count, 1),
+        }
+
+    def bulk_import(self, count, workers):
+        rows = [{'email': f'bulk-{uuid4().hex}@example.com', 'password': f'Banket-pass-{i}'} for i in range(count)]
+        began = time.perf_counter()
+        created, _ = import_users(rows, workers=workers)
+        elapsed = time.perf_counter() - began
+        return {'users': created, 'users_per_second': round(created / elapsed, 1)}
@@ -0,0 +1,23 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.bulk import IMPORT_BATCH_SIZE, import_users
+
+
+class Command(BaseCommand):
+    help = 'Registers users from a CSV file with email, password, first_name and last_name columns, ' \
+           'hashing passwords in a process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row.')
+        parser.add_argument('--workers', type=int, help='Hashing processes; defaults to the number of CPUs.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Users inserted per query.')
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='') as f:
+            rows = list(csv.DictReader(f))
+        if rows and not {'email', 'password'} <= set(rows[0]):
+            raise CommandError('The CSV file needs email and password columns.')
+        created, skipped = import_users(rows, workers=options['workers'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} users, skipped {skipped} already registered'))
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from apps.banket.operations import PostgresOnly
+
+SEARCH_COLUMNS = ('email', 'first_name', 'last_name')
+
+
+def search_index_sql(column):
+    # Matches the UPPER(column) LIKE UPPER(%s) lookup that icontains compiles to.
+    return (
+        f'CREATE INDEX IF NOT EXISTS auth_user_{column}_upper_trgm_idx '
+        f'ON auth_user USING gin (UPPER({column}) gin_trgm_ops);'
+    )
+
+
+def drop_search_index_sql(column):
+    return f'DROP INDEX IF EXISTS auth_user_{column}_upper_trgm_idx;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        # pg_trgm is installed there.
+        ('banket', '0008_search_vectors'),
+    ]
+
+    operations = [
+        PostgresOnly(migrations.RunSQL(search_index_sql(column), drop_search_index_sql(column)))
+        for column in SEARCH_COLUMNS
+    ]
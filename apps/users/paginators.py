@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key: every page is an index range
+    scan from the previous page's last id, with no COUNT(*) and no OFFSET,
+    so deep pages of a large user table cost the same as the first one.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
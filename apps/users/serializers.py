@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
@@ -17,3 +18,33 @@ class UserSerializer(serializers.ModelSerializer):
             'email',
             'password',
         )
+
+    def create(self, validated_data):
+        """
+        Hashes the password before the first save, so registration is a single
+        INSERT. The email validator rejects emails already used by any user;
+        a concurrent registration of the same email that passes it together
+        hits the unique username column (registration uses the email as
+        username) and is reported the same way.
+        """
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        user.set_password(password)
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            raise serializers.ValidationError({'email': 'A user with this email already exists.'})
+        return user
+
+
+class UserListSerializer(serializers.Serializer):
+    """
+    Read-only projection for listing users. It carries none of the
+    registration machinery (password validation, model field introspection)
+    and works directly on the dicts produced by `.values()`.
+    """
+    id = serializers.IntegerField(read_only=True)
+    first_name = serializers.CharField(read_only=True)
+    last_name = serializers.CharField(read_only=True)
+    email = serializers.EmailField(read_only=True)
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.banket.factories import create_user, get_auth_header
+from apps.users.authentication import invalidate_cached_users
+from apps.users.bulk import import_users
+
+
+class UserQueryBudgetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        for _ in range(30):
+            create_user()
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(**get_auth_header(self.user))
+
+    def test_profile_is_served_from_the_auth_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('get_profile'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_profile'))
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_profile_reflects_user_changes(self):
+        self.client.get(reverse('get_profile'))
+        self.user.first_name = 'Changed'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('get_profile')).data['first_name'], 'Changed')
+
+    def test_list(self):
+        self.client.get(reverse('get_profile'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_users'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'first_name', 'last_name', 'email'})
+
+    def test_list_pages_by_keyset(self):
+        self.client.get(reverse('get_profile'))
+        seen = []
+        url = reverse('get_users') + '?page_size=7'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            seen.extend(user['id'] for user in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, list(User.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_list_search(self):
+        target = create_user(first_name='Zebulon')
+        response = self.client.get(reverse('get_users'), {'search': 'zebul'})
+        self.assertEqual([user['id'] for user in response.data['results']], [target.id])
+        response = self.client.get(reverse('get_users'), {'search': target.email.upper()})
+        self.assertEqual([user['id'] for user in response.data['results']], [target.id])
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.credentials(**get_auth_header(self.user))
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 200)
+
+    def test_deactivation_is_seen_on_the_next_request(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 401)
+
+    def test_deletion_is_seen_on_the_next_request(self):
+        self.user.delete()
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 401)
+
+    def test_bulk_update_needs_explicit_invalidation(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 200)
+        invalidate_cached_users([self.user.pk])
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 401)
+
+    @override_settings(JWT_AUTH_CACHE_TIMEOUT=60)
+    def test_token_is_not_cached_past_its_expiry(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=5))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.assertEqual(self.client.get(reverse('get_profile')).status_code, 200)
+        (key, value, timeout), _ = cache_set.call_args_list[0]
+        self.assertTrue(key.startswith('jwt-token:'))
+        self.assertLessEqual(timeout, 5)
+
+    def test_cached_token_is_still_checked_for_expiry(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=5))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('get_profile')).status_code, 200)
+        later = token.current_time + timedelta(seconds=10)
+        with mock.patch('rest_framework_simplejwt.tokens.aware_utcnow', return_value=later):
+            self.assertEqual(self.client.get(reverse('get_profile')).status_code, 401)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class RegistrationTests(APITestCase):
+    def register(self, email='new@example.com'):
+        return self.client.post(reverse('token_register'), {
+            'email': email, 'password': 'Banket-pass-123', 'first_name': 'New', 'last_name': 'User',
+        })
+
+    def test_registration_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+        self.assertEqual(response.status_code, 201, response.content)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual([statement for statement in statements if statement in ('SELECT', 'INSERT', 'UPDATE')],
+                         ['SELECT', 'INSERT'])
+        user = User.objects.get(username='new@example.com')
+        self.assertTrue(user.check_password('Banket-pass-123'))
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_duplicate_email_is_rejected(self):
+        self.register()
+        response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+
+    def test_email_of_another_username_is_rejected(self):
+        User.objects.create_user('admin', 'taken@example.com', 'Banket-pass-123')
+        response = self.register('taken@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+        self.assertEqual(User.objects.filter(email='taken@example.com').count(), 1)
+
+    def test_concurrent_duplicate_is_reported_on_email(self):
+        self.register()
+        with mock.patch('rest_framework.validators.UniqueValidator.__call__'):
+            response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
+
+    def test_login_rehashes_with_the_configured_iterations(self):
+        self.register()
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.client.post(reverse('token_obtain_pair'), {
+                'username': 'new@example.com', 'password': 'Banket-pass-123',
+            })
+        self.assertTrue(User.objects.get(username='new@example.com').password.startswith('pbkdf2_sha256$2000$'))
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class BulkImportTests(APITestCase):
+    def test_import_skips_registered_and_repeated_emails(self):
+        existing = create_user()
+        rows = [
+            {'email': existing.email, 'password': 'x'},
+            {'email': 'a@example.com', 'password': 'Banket-pass-1', 'first_name': 'A'},
+            {'email': 'a@example.com', 'password': 'Banket-pass-2'},
+            {'email': 'b@example.com', 'password': 'Banket-pass-3'},
+        ]
+        self.assertEqual(import_users(rows, workers=1), (2, 2))
+        self.assertTrue(User.objects.get(username='a@example.com').check_password('Banket-pass-1'))
+        self.assertFalse(User.objects.filter(username__in=['a@example.com', 'b@example.com'], is_staff=True).exists())
+
+    def test_import_skips_emails_registered_under_another_username(self):
+        User.objects.create_user('admin', 'taken@example.com', 'Banket-pass-123')
+        rows = [{'email': 'taken@example.com', 'password': 'x'}, {'email': 'c@example.com', 'password': 'y'}]
+        self.assertEqual(import_users(rows, workers=1), (1, 1))
+        self.assertEqual(User.objects.filter(email='taken@example.com').count(), 1)
+
+    def test_import_counts_only_inserted_rows(self):
+        rows = [{'email': f'race{i}@example.com', 'password': 'x'} for i in range(3)]
+        original = User.objects.bulk_create
+
+        def bulk_create(users, **kwargs):
+            # Another registration takes one of the emails after the check.
+            User.objects.create_user('race1@example.com', 'race1@example.com', 'Banket-pass-123')
+            return original(users, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', bulk_create), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(import_users(rows, workers=1), (2, 1))
+        self.assertFalse([query for query in queries if '"password" IN' in query['sql']])
+        self.assertEqual(User.objects.filter(username__startswith='race').count(), 3)
+
+    def test_command_hashes_in_a_process_pool(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('email,password,first_name,last_name\n')
+            f.writelines(f'user{i}@example.com,Banket-pass-{i},User,{i}\n' for i in range(20))
+        self.addCleanup(os.remove, f.name)
+        call_command('import_users', f.name, '--workers', '2', stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 20)
+        self.assertTrue(User.objects.get(username='user7@example.com').check_password('Banket-pass-7'))
@@ -3,12 +3,14 @@ from django.core.serializers import serialize
 
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from apps.users.serializers import UserSerializer
+from apps.users.authentication import CachedJWTAuthentication
+from apps.users.paginators import UserCursorPagination
+from apps.users.serializers import UserListSerializer, UserSerializer
 
 
 class UserRegistrationView(generics.GenericAPIView):
@@ -18,29 +20,30 @@ class UserRegistrationView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        validated_data = serializer.validated_data
-        user = serializer.save(username=validated_data['email'], is_staff=True)
-        user.set_password(validated_data['password'])
-        user.save()
+        serializer.save(username=serializer.validated_data['email'], is_staff=True)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class UserListView(generics.ListAPIView):
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (JWTAuthentication,)
-    serializer_class = UserSerializer
-    queryset = User.objects.all()
+    authentication_classes = (CachedJWTAuthentication,)
+    serializer_class = UserListSerializer
+    pagination_class = UserCursorPagination
+    filter_backends = (SearchFilter,)
+    # Backed by the trigram indexes on UPPER(column) in users.0001.
+    search_fields = ('email', 'first_name', 'last_name')
+    queryset = User.objects.values('id', 'first_name', 'last_name', 'email')
 
 
 class UserDetailView(generics.GenericAPIView):
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     serializer_class = UserSerializer
     queryset = User.objects.all()
 
     def get(self, request, *args, **kwargs):
-        user = User.objects.get(id=self.request.user.id)
+        user = request.user
         data = {
             "first_name": user.first_name,
             "last_name": user.last_name,
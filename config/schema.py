@@ -0,0 +1,85 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+
+
+def get_api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="API Documentation",
+        default_version='v1',
+        description="Enjoy",
+    )
+
+
+def generate_schema(validate=False):
+    """
+    Introspects every viewset and returns the OpenAPI document as JSON bytes.
+    Validation with swagger-spec-validator is slow and only meant for CI.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(get_api_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=['ssv'] if validate else []).encode(schema)
+
+
+@lru_cache(maxsize=1)
+def read_schema(path, mtime_ns):
+    with open(path, 'rb') as f:
+        content = f.read()
+    return content, f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def load_schema():
+    """
+    Returns (content, etag) of the pre-generated schema file. The file is read
+    once per process and modification time, so a regenerated file is served
+    without any invalidation step and without a shared cache.
+    """
+    path = settings.OPENAPI_SCHEMA_PATH
+    try:
+        return read_schema(path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+def openapi_schema(request):
+    schema = load_schema()
+    if schema is None:
+        raise Http404('The OpenAPI schema has not been generated; run manage.py generate_schema.')
+    content, etag = schema
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}'
+    return response
+
+
+@lru_cache(maxsize=None)
+def get_swagger_ui_view():
+    """
+    Builds the Swagger UI view on first use instead of at URLconf import, so
+    processes that never serve the docs never import drf_yasg. The page only
+    renders HTML; the document itself is loaded from `openapi_schema`.
+    """
+    from drf_yasg.renderers import SwaggerUIRenderer
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    schema_view = get_schema_view(
+        get_api_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny, )
+    )
+    return schema_view.as_cached_view(renderer_classes=(SwaggerUIRenderer,))
+
+
+def swagger_ui(request, *args, **kwargs):
+    return get_swagger_ui_view()(request, *args, **kwargs)
@@ -19,6 +19,12 @@ CORS_ORIGIN_WHITELIST = (
     'http://localhost:3000',
 )
 
+DJANGO_PROFILE = os.environ.get('DJANGO_PROFILE', 'development')
+
+# Admin theme, Swagger UI and the nose runner are only needed while
+# developing; production workers start without importing them.
+DEVELOPMENT_APPS = ['jazzmin', 'drf_yasg', 'django_nose']
+
 INSTALLED_APPS = [
     'jazzmin',
     # Django
@@ -28,20 +34,26 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_filters',
     # Third-party
     'rest_framework',
     'drf_yasg',
-    'rest_framework.authtoken',
     'rest_framework_simplejwt',
     'django_nose',
     'corsheaders',
     # Apps
     'apps.banket',
     'apps.users',
+    'apps.metrics',
+    'apps.analytics',
 ]
 
-TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
+if DJANGO_PROFILE == 'production':
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEVELOPMENT_APPS]
+
+if 'django_nose' in INSTALLED_APPS:
+    TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
 
 NOSE_ARGS = [
     '--with-coverage',
@@ -50,6 +62,7 @@ NOSE_ARGS = [
 ]
 
 MIDDLEWARE = [
+    'apps.metrics.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +104,15 @@ DATABASES = {
     }
 }
 
+PASSWORD_HASHERS = [
+    'apps.users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 390000))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,7 +130,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -120,6 +142,10 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.OrderingFilter',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'user': os.environ.get('THROTTLE_USER_RATE', '120/min'),
+        'ip': os.environ.get('THROTTLE_IP_RATE', '300/min'),
+    },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
 }
@@ -131,9 +157,13 @@ SWAGGER_SETTINGS = {
             'name': 'Authorization',
             'in': 'header'
         }
-    }
+    },
+    'SPEC_URL': 'openapi-schema',
 }
 
+OPENAPI_SCHEMA_PATH = os.environ.get('OPENAPI_SCHEMA_PATH', os.path.join(BASE_DIR, 'schema', 'openapi.json'))
+OPENAPI_SCHEMA_MAX_AGE = int(os.environ.get('OPENAPI_SCHEMA_MAX_AGE', 5 * 60))
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -152,9 +182,50 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Throttle buckets, cached JWT users and their invalidation must be seen by
+# every worker process, so production needs a shared cache: Redis when
+# REDIS_URL is set, otherwise the database cache table (createcachetable).
+# Development and tests keep Django's default per-process LocMemCache, and so
+# do one-off processes without services (LOCAL_CACHE=True, e.g. image builds).
+REDIS_URL = os.environ.get('REDIS_URL')
+LOCAL_CACHE = os.environ.get('LOCAL_CACHE', 'False') == 'True'
+if REDIS_URL and not LOCAL_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+elif DJANGO_PROFILE == 'production' and not LOCAL_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        },
+    }
+
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
+# Upper bound on how long a user changed by QuerySet.update() (no signals)
+# stays cached for authentication.
+JWT_AUTH_CACHE_TIMEOUT = int(os.environ.get('JWT_AUTH_CACHE_TIMEOUT', 60))
+HALL_LAYOUT_CACHE_TIMEOUT = int(os.environ.get('HALL_LAYOUT_CACHE_TIMEOUT', 60 * 60))
+PRICE_TABLE_TIMEOUT = int(os.environ.get('PRICE_TABLE_TIMEOUT', 5 * 60))
+REQUEST_COALESCING = os.environ.get('REQUEST_COALESCING', 'True') == 'True'
+
+SCHEDULER_TICK = int(os.environ.get('SCHEDULER_TICK', 60))
+EVENT_RETENTION_DAYS = int(os.environ.get('EVENT_RETENTION_DAYS', 30))
+ANALYTICS_LOOKBACK_DAYS = int(os.environ.get('ANALYTICS_LOOKBACK_DAYS', 7))
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+IDEMPOTENCY_IN_PROGRESS_LEASE = int(os.environ.get('IDEMPOTENCY_IN_PROGRESS_LEASE', 5 * 60))
+SYNC_CURSOR_OVERLAP = int(os.environ.get('SYNC_CURSOR_OVERLAP', 5))
+FEED_POLL_OVERLAP = int(os.environ.get('FEED_POLL_OVERLAP', 5))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+JOB_RUN_RETENTION_DAYS = int(os.environ.get('JOB_RUN_RETENTION_DAYS', 30))
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
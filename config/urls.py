@@ -2,26 +2,17 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-from config import settings
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API Documentation",
-        default_version='v1',
-        description="Enjoy",
-    ),
-    validators=['ssv'],
-    public=True,
-    permission_classes=(permissions.AllowAny, )
-)
+from config.schema import openapi_schema, swagger_ui
 
 urlpatterns = [
-    path('', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('openapi.json', openapi_schema, name='openapi-schema'),
     path('admin/', admin.site.urls),
     path('users/', include('apps.users.urls')),
     path('banket/', include('apps.banket.urls')),
+    path('metrics/', include('apps.metrics.urls')),
+    path('analytics/', include('apps.analytics.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if 'drf_yasg' in settings.INSTALLED_APPS:
+    urlpatterns.insert(0, path('', swagger_ui, name='schema-swagger-ui'))
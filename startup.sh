@@ -2,4 +2,5 @@
 python3 manage.py collectstatic --noinput
 python3 manage.py makemigrations
 python3 manage.py migrate
+python3 manage.py createcachetable
 python3 manage.py runserver 0.0.0.0:8000
\ No newline at end of file